@@ -0,0 +1,129 @@
+"""
+Adaptive concurrency limit for DB-bound requests
+Performance: get_db admits at most `limit` concurrent requests per worker.
+The limit follows pool checkout waits (AIMD): when more than
+SLOW_SHARE of the checkouts in a window wait longer than
+DB_CHECKOUT_TARGET_MS, the limit is cut by DECREASE; when the limit was
+reached with fast checkouts it grows by one. Requests beyond the limit wait
+at most DB_ADMISSION_MAX_WAIT_MS and are then rejected with 503, instead of
+queueing inside the pool for DB_POOL_TIMEOUT seconds.
+Disabled (admits everything) unless DB_ADAPTIVE_CONCURRENCY is set.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Deque
+from app.config import settings
+from app.metrics import registry, db_admission_rejected_total
+
+# Share of slow checkouts in a window that triggers a decrease
+SLOW_SHARE = 0.1
+# Multiplicative decrease factor
+DECREASE = 0.8
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD limit on in-flight DB-bound requests, driven by checkout waits"""
+
+    def __init__(
+        self,
+        enabled: bool,
+        min_limit: int,
+        max_limit: int,
+        target_wait: float,
+        max_queue_wait: float,
+        window_seconds: float = 1.0,
+    ):
+        self.enabled = enabled
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_wait = target_wait
+        self.max_queue_wait = max_queue_wait
+        self.window_seconds = window_seconds
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._window_started = time.monotonic()
+        self._checkouts = 0
+        self._slow_checkouts = 0
+        self._peak_in_flight = 0
+
+    async def acquire(self) -> bool:
+        """Take a slot; False when none freed up within max_queue_wait"""
+        if not self.enabled:
+            return True
+        if not self._waiters and self.in_flight < int(self.limit):
+            self._admit()
+            return True
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await asyncio.wait_for(future, self.max_queue_wait)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            # Pass on a wake-up this waiter can no longer use
+            if future.done() and not future.cancelled():
+                self._wake(1)
+            raise
+        finally:
+            self._waiters.remove(future)
+
+        if self.in_flight < int(self.limit):
+            self._admit()
+            return True
+        db_admission_rejected_total.inc()
+        return False
+
+    def release(self) -> None:
+        if not self.enabled:
+            return
+        self.in_flight -= 1
+        self._wake(int(self.limit) - self.in_flight)
+
+    def _admit(self) -> None:
+        self.in_flight += 1
+        self._peak_in_flight = max(self._peak_in_flight, self.in_flight)
+
+    def _wake(self, slots: int) -> None:
+        for future in self._waiters:
+            if slots <= 0:
+                return
+            if not future.done():
+                future.set_result(None)
+                slots -= 1
+
+    def observe_wait(self, seconds: float) -> None:
+        """Feed one pool checkout wait (called by the instrumented pool)"""
+        if not self.enabled:
+            return
+        self._checkouts += 1
+        if seconds > self.target_wait:
+            self._slow_checkouts += 1
+
+        now = time.monotonic()
+        if now - self._window_started < self.window_seconds:
+            return
+        if self._slow_checkouts > self._checkouts * SLOW_SHARE:
+            self.limit = max(float(self.min_limit), self.limit * DECREASE)
+        elif self._peak_in_flight >= int(self.limit):
+            self.limit = min(float(self.max_limit), self.limit + 1)
+            self._wake(int(self.limit) - self.in_flight)
+        self._window_started = now
+        self._checkouts = self._slow_checkouts = 0
+        self._peak_in_flight = self.in_flight
+
+
+db_admission = AdaptiveConcurrencyLimiter(
+    enabled=settings.DB_ADAPTIVE_CONCURRENCY,
+    min_limit=settings.DB_CONCURRENCY_MIN,
+    max_limit=settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW,
+    target_wait=settings.DB_CHECKOUT_TARGET_MS / 1000,
+    max_queue_wait=settings.DB_ADMISSION_MAX_WAIT_MS / 1000,
+)
+
+registry.gauge("db_concurrency_limit", "Current adaptive limit on concurrent DB-bound requests",
+               func=lambda: int(db_admission.limit))
+registry.gauge("db_admission_in_flight", "DB-bound requests currently admitted",
+               func=lambda: db_admission.in_flight)
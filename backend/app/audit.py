@@ -0,0 +1,100 @@
+"""
+Persistent security audit log
+Performance: Events are buffered in memory and written in multi-row inserts,
+so rejected requests never wait on a database round trip
+Security: Bounded buffer; events beyond it are dropped and counted
+"""
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+from sqlalchemy import insert
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models import SecurityEvent
+
+logger = logging.getLogger(__name__)
+
+
+class AuditSink:
+    """
+    Buffer of security events flushed to the security_events table when
+    batch_size events are waiting or every flush_interval seconds
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_buffer: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.stats: Dict[str, int] = {"recorded": 0, "written": 0, "dropped": 0, "failed": 0}
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    def record(self, event_type: str, **fields: Any) -> None:
+        """Queue an event without blocking; drops it when the buffer is full"""
+        if len(self._buffer) >= self.max_buffer:
+            self.stats["dropped"] += 1
+            return
+        self._buffer.append({"event_type": event_type, "created_at": datetime.utcnow(), **fields})
+        self.stats["recorded"] += 1
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher and write what is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        while self._buffer:
+            if not await self.flush():
+                break
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._buffer:
+                if not await self.flush():
+                    break
+                if len(self._buffer) < self.batch_size:
+                    break
+
+    async def flush(self) -> bool:
+        """Write up to batch_size buffered events in one insert; False on failure"""
+        batch: List[Dict[str, Any]] = []
+        while self._buffer and len(batch) < self.batch_size:
+            batch.append(self._buffer.popleft())
+        if not batch:
+            return True
+        try:
+            async with AsyncSessionLocal() as session:
+                async with session.begin():
+                    await session.execute(insert(SecurityEvent), batch)
+        except Exception as e:
+            # Security: The batch is dropped rather than retried so a database
+            # outage cannot grow memory; the loss is visible in stats
+            self.stats["failed"] += len(batch)
+            logger.error(f"Security audit flush failed: {e}")
+            return False
+        self.stats["written"] += len(batch)
+        return True
+
+
+audit_sink = AuditSink(
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_SECONDS,
+    max_buffer=settings.AUDIT_MAX_BUFFER,
+)
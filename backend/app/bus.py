@@ -0,0 +1,261 @@
+"""
+Cross-worker notification bus for user-targeted events
+Performance: Handlers publish once; every worker's subscribers receive the event
+
+Backends:
+- local: single process, events only reach subscribers in this worker
+- unix:  single host; one worker is elected broker (via a lock file) and
+         relays newline-delimited JSON between workers over a Unix socket.
+         Falls back to local where fcntl is unavailable (Windows)
+
+Other backends (for example Redis pub/sub) subclass EventBus, implement
+_forward, start and stop, and are selected by setting EVENT_BUS_BACKEND to
+"package.module:factory".
+"""
+import asyncio
+import importlib
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional, Set
+from app.config import runtime_path, settings
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Event topics
+TOPIC_MESSAGE = "message"
+TOPIC_MESSAGE_STATUS = "message_status"
+TOPIC_GROUP = "group"
+TOPIC_VAULT = "vault"
+# Internal cache invalidation between workers; never streamed to clients
+TOPIC_CACHE = "cache"
+
+Handler = Callable[[int, str, Dict[str, Any]], None]
+
+
+class EventBus:
+    """
+    Bus interface and in-process dispatch shared by all backends
+    Security: Events carry the target user id; subscribers filter on it
+    """
+
+    def __init__(self):
+        self._handlers: List[Handler] = []
+        self.stats: Dict[str, int] = {"published": 0, "received": 0, "dropped": 0}
+
+    def subscribe(self, handler: Handler) -> None:
+        """Register a handler called as handler(user_id, topic, payload)"""
+        self._handlers.append(handler)
+
+    def publish(self, user_id: int, topic: str, payload: Dict[str, Any]) -> None:
+        """Deliver to local subscribers now and forward to other workers"""
+        self.stats["published"] += 1
+        self._dispatch(user_id, topic, payload)
+        self._forward({"user_id": user_id, "topic": topic, "payload": payload})
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def _forward(self, event: Dict[str, Any]) -> None:
+        """Send an event to other workers (no-op for single-process backends)"""
+
+    def _receive(self, event: Dict[str, Any]) -> None:
+        """Dispatch an event that arrived from another worker"""
+        self.stats["received"] += 1
+        try:
+            self._dispatch(int(event["user_id"]), str(event["topic"]), event["payload"])
+        except (KeyError, TypeError, ValueError):
+            self.stats["dropped"] += 1
+
+    def _dispatch(self, user_id: int, topic: str, payload: Dict[str, Any]) -> None:
+        for handler in self._handlers:
+            try:
+                handler(user_id, topic, payload)
+            except Exception as e:
+                logger.error(f"Event bus handler failed: {e}", exc_info=True)
+
+
+class LocalEventBus(EventBus):
+    """Single-process backend"""
+
+
+class UnixSocketEventBus(EventBus):
+    """
+    Single-host backend over a Unix domain socket
+    The worker holding the lock file runs the broker; the others connect to it.
+    If the broker exits, a remaining worker takes the lock and replaces it.
+    """
+
+    def __init__(self, socket_path: str, max_buffer_bytes: int, retry_seconds: float):
+        super().__init__()
+        self.socket_path = socket_path
+        self.lock_path = socket_path + ".lock"
+        self.max_buffer_bytes = max_buffer_bytes
+        self.retry_seconds = retry_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._lock_fd: Optional[int] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._peers: Set[asyncio.StreamWriter] = set()
+        self._upstream: Optional[asyncio.StreamWriter] = None
+
+    @property
+    def is_broker(self) -> bool:
+        return self._server is not None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self._close_broker()
+        if self._upstream is not None:
+            self._upstream.close()
+            self._upstream = None
+
+    def _forward(self, event: Dict[str, Any]) -> None:
+        line = (json.dumps(event, separators=(",", ":")) + "\n").encode()
+        if self.is_broker:
+            for peer in list(self._peers):
+                self._write(peer, line)
+        elif self._upstream is not None:
+            self._write(self._upstream, line)
+        else:
+            # Broker unreachable; SSE clients resync from the database on reconnect
+            self.stats["dropped"] += 1
+
+    def _write(self, writer: asyncio.StreamWriter, line: bytes) -> None:
+        """Non-blocking write; drop instead of buffering for a slow peer"""
+        if writer.transport.get_write_buffer_size() > self.max_buffer_bytes:
+            self.stats["dropped"] += 1
+            return
+        writer.write(line)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if self._try_lock():
+                    await self._serve()
+                else:
+                    await self._follow()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Event bus connection lost: {e}")
+            await asyncio.sleep(self.retry_seconds)
+
+    def _try_lock(self) -> bool:
+        fd = os.open(self.lock_path, os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    async def _serve(self) -> None:
+        """Broker role: accept workers and relay each event to all others"""
+        try:
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            self._server = await asyncio.start_unix_server(self._handle_peer, path=self.socket_path)
+            os.chmod(self.socket_path, 0o600)
+            logger.info(f"Event bus broker listening on {self.socket_path}")
+            await self._server.serve_forever()
+        finally:
+            await self._close_broker()
+
+    async def _close_broker(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        for peer in list(self._peers):
+            peer.close()
+        self._peers.clear()
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    async def _handle_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._peers.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                for peer in list(self._peers):
+                    if peer is not writer:
+                        self._write(peer, line)
+                self._receive_line(line)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._peers.discard(writer)
+            writer.close()
+
+    async def _follow(self) -> None:
+        """Worker role: connect to the broker and dispatch what it relays"""
+        try:
+            reader, writer = await asyncio.open_unix_connection(self.socket_path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            return
+        self._upstream = writer
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self._receive_line(line)
+        finally:
+            self._upstream = None
+            writer.close()
+
+    def _receive_line(self, line: bytes) -> None:
+        try:
+            event = json.loads(line)
+        except ValueError:
+            self.stats["dropped"] += 1
+            return
+        self._receive(event)
+
+
+def _unix_event_bus() -> EventBus:
+    if fcntl is None:
+        logger.warning("Unix socket event bus unavailable on this platform; using local")
+        return LocalEventBus()
+    return UnixSocketEventBus(
+        settings.EVENT_BUS_SOCKET_PATH or runtime_path("bus.sock"),
+        max_buffer_bytes=settings.EVENT_BUS_MAX_BUFFER_BYTES,
+        retry_seconds=settings.EVENT_BUS_RETRY_SECONDS,
+    )
+
+
+_BACKENDS: Dict[str, Callable[[], EventBus]] = {
+    "local": LocalEventBus,
+    "unix": _unix_event_bus,
+}
+
+
+def create_event_bus(backend: str) -> EventBus:
+    """Build a bus from a built-in name or a "package.module:factory" path"""
+    factory = _BACKENDS.get(backend)
+    if factory is None:
+        module_name, _, attr = backend.partition(":")
+        if not attr:
+            raise ValueError(f"Unknown event bus backend: {backend}")
+        factory = getattr(importlib.import_module(module_name), attr)
+    return factory()
+
+
+event_bus = create_event_bus(settings.EVENT_BUS_BACKEND)
@@ -0,0 +1,106 @@
+"""
+In-process caches for hot authorization lookups
+Security: Short TTLs and explicit invalidation keep cached roles fresh;
+invalidations are published on the event bus so every worker applies them
+"""
+import time
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.bus import event_bus, TOPIC_CACHE
+from app.config import settings
+from app.models import GroupMember
+from app.metrics import cache_requests_total
+
+
+class GroupRoleCache:
+    """
+    Per-user cache mapping group name to admin flag
+    Security: Entries expire after a short TTL; writers invalidate explicitly.
+    Invalidations bump a generation, and a load that raced with one is not
+    stored, so roles read before a change never outlive it
+    """
+    # Tracked user generations before they are reset (with an epoch bump)
+    MAX_GENERATIONS = 10000
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        # user_id -> (loaded_at, {group_name: is_admin})
+        self._entries: Dict[int, Tuple[float, Dict[str, bool]]] = {}
+        # user_id -> invalidation count; the epoch covers group-wide invalidations
+        self._generations: Dict[int, int] = {}
+        self._epoch = 0
+
+    def _generation(self, user_id: int) -> Tuple[int, int]:
+        return self._epoch, self._generations.get(user_id, 0)
+
+    async def get_roles(self, db: AsyncSession, user_id: int) -> Dict[str, bool]:
+        """Return all group roles for a user, loading them in one query on a miss"""
+        entry = self._entries.get(user_id)
+        now = time.monotonic()
+        if entry is not None and now - entry[0] < self.ttl_seconds:
+            cache_requests_total.inc("group_roles", "hit")
+            return entry[1]
+        cache_requests_total.inc("group_roles", "miss")
+
+        generation = self._generation(user_id)
+        result = await db.execute(
+            select(GroupMember.group_name, GroupMember.admin_status).where(
+                GroupMember.user_id == user_id
+            )
+        )
+        roles = {group_name: bool(is_admin) for group_name, is_admin in result.all()}
+        # Security: Skip the store when an invalidation ran during the load
+        if self._generation(user_id) == generation:
+            self._entries[user_id] = (now, roles)
+        return roles
+
+    async def get_role(self, db: AsyncSession, user_id: int, group_name: str) -> Optional[bool]:
+        """Return the admin flag for a membership, or None if the user is not a member"""
+        roles = await self.get_roles(db, user_id)
+        return roles.get(group_name)
+
+    async def is_admin(self, db: AsyncSession, user_id: int, group_name: str) -> bool:
+        """Check whether a user is admin of a group"""
+        return bool(await self.get_role(db, user_id, group_name))
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop cached roles for one user on every worker"""
+        event_bus.publish(user_id, TOPIC_CACHE, {"cache": "group_roles"})
+
+    def invalidate_group(self, group_name: str) -> None:
+        """Drop cached roles for every user that has the group cached, on every worker"""
+        # Not targeted at a user: user id 0 never exists
+        event_bus.publish(0, TOPIC_CACHE, {"cache": "group_roles", "group_name": group_name})
+
+    def on_event(self, user_id: int, topic: str, payload: Dict[str, Any]) -> None:
+        """Event bus handler: apply invalidations published by any worker"""
+        if topic != TOPIC_CACHE or payload.get("cache") != "group_roles":
+            return
+        group_name = payload.get("group_name")
+        if group_name is None:
+            self._entries.pop(user_id, None)
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            if len(self._generations) > self.MAX_GENERATIONS:
+                self._generations.clear()
+                self._epoch += 1
+            return
+        # Loads in flight may be for any member of the group
+        self._epoch += 1
+        stale = [
+            cached_user_id
+            for cached_user_id, (_, roles) in self._entries.items()
+            if group_name in roles
+        ]
+        for cached_user_id in stale:
+            self._entries.pop(cached_user_id, None)
+
+    def clear(self) -> None:
+        """Drop all cached roles"""
+        self._entries.clear()
+        self._epoch += 1
+
+
+# Security: Shared role cache for group authorization checks
+group_role_cache = GroupRoleCache(ttl_seconds=settings.GROUP_ROLE_CACHE_TTL_SECONDS)
+event_bus.subscribe(group_role_cache.on_event)
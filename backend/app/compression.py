@@ -0,0 +1,110 @@
+"""
+Response compression codecs and Accept-Encoding negotiation
+Performance: gzip is always available; brotli and zstd are used when their
+optional packages (brotli, zstandard) are installed and the client accepts them
+"""
+import zlib
+from typing import Callable, Dict, List, Optional, Protocol
+from app.config import settings
+
+try:
+    import brotli
+except ImportError:  # Optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # Optional dependency
+    zstandard = None
+
+
+class Compressor(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+    def flush(self) -> bytes: ...
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdCompressor:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+def gzip_compressor(level: int) -> Compressor:
+    # wbits=31: zlib stream with a gzip header and trailer
+    return zlib.compressobj(level, zlib.DEFLATED, 31)
+
+
+def brotli_compressor(level: int) -> Compressor:
+    return _BrotliCompressor(level)
+
+
+def zstd_compressor(level: int) -> Compressor:
+    return _ZstdCompressor(level)
+
+
+# Content-coding -> factory(level); server preference order, best ratio first
+CODECS: Dict[str, Callable[[int], Compressor]] = {}
+if brotli is not None:
+    CODECS["br"] = brotli_compressor
+if zstandard is not None:
+    CODECS["zstd"] = zstd_compressor
+CODECS["gzip"] = gzip_compressor
+
+
+def codec_level(encoding: str) -> int:
+    return {
+        "br": settings.COMPRESSION_BROTLI_QUALITY,
+        "zstd": settings.COMPRESSION_ZSTD_LEVEL,
+        "gzip": settings.COMPRESSION_GZIP_LEVEL,
+    }[encoding]
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Map each listed content-coding to its q-value"""
+    accepted: Dict[str, float] = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def negotiate(header: Optional[str], available: Optional[List[str]] = None) -> Optional[str]:
+    """Pick the content-coding for a response, or None for identity"""
+    if not header:
+        return None
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in available if available is not None else CODECS:
+        quality = accepted.get(encoding, wildcard)
+        # Ties keep the server preference order
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
@@ -4,7 +4,9 @@ Security: All sensitive data loaded from environment variables
 """
 from pydantic_settings import BaseSettings
 from typing import Optional
+import hashlib
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -18,6 +20,14 @@ class Settings(BaseSettings):
     HOST: str = os.getenv("HOST", "0.0.0.0")
     PORT: int = int(os.getenv("PORT", "8000"))
     
+    # Performance: Production server (python -m app.server)
+    SERVER_WORKERS: int = int(os.getenv("SERVER_WORKERS", "0"))  # 0: size from CPU and memory
+    SERVER_WORKER_BASE_MB: int = 150  # Resident memory of an idle worker
+    SERVER_MEMORY_BUDGET_MB: int = int(os.getenv("SERVER_MEMORY_BUDGET_MB", "0"))  # 0: MemAvailable
+    SERVER_GRACEFUL_TIMEOUT: int = 30
+    SERVER_MAX_REQUESTS: int = int(os.getenv("SERVER_MAX_REQUESTS", "0"))  # Recycle workers; 0: never
+    SERVER_BACKLOG: int = 2048
+    
     # Database Configuration - Security: Credentials from environment
     DB_HOST: str = os.getenv("DB_HOST", "192.168.2.234")
     DB_USER: str = os.getenv("DB_USER", "uss-lousser")
@@ -30,6 +40,14 @@ class Settings(BaseSettings):
     DB_MAX_OVERFLOW: int = 20
     DB_POOL_TIMEOUT: int = 30
     DB_POOL_RECYCLE: int = 3600
+    DB_POOL_PREWARM: bool = True  # Performance: Open DB_POOL_SIZE connections at startup
+    DB_POOL_PREWARM_TIMEOUT_SECONDS: float = 5.0
+    
+    # Performance: Adaptive limit on concurrent DB-bound requests (503 when exceeded)
+    DB_ADAPTIVE_CONCURRENCY: bool = os.getenv("DB_ADAPTIVE_CONCURRENCY", "False").lower() == "true"
+    DB_CHECKOUT_TARGET_MS: float = 50.0
+    DB_ADMISSION_MAX_WAIT_MS: float = 200.0
+    DB_CONCURRENCY_MIN: int = 2
     
     # JWT Configuration - Security: Secret key from environment
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "change-this-secret-key-in-production-use-strong-random-key")
@@ -49,6 +67,12 @@ class Settings(BaseSettings):
     RATE_LIMIT_AUTH: str = "5/minute"
     RATE_LIMIT_PASSWORD: str = "20/minute"
     RATE_LIMIT_GENERAL: str = "100/minute"
+    # Performance: "memory" (per worker) or "shared" (all workers on the host)
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMIT_SHARDS: int = 64
+    # Empty: a file in this deployment's private runtime directory
+    RATE_LIMIT_SHARED_PATH: str = os.getenv("RATE_LIMIT_SHARED_PATH", "")
+    RATE_LIMIT_SHARED_SLOTS: int = 65536
     
     # Security: CORS configuration
     # For mobile apps, allow all origins (CORS is less restrictive for mobile)
@@ -75,13 +99,88 @@ class Settings(BaseSettings):
     SESSION_TIMEOUT_MINUTES: int = 30
     MAX_LOGIN_ATTEMPTS: int = 5
     LOCKOUT_DURATION_MINUTES: int = 15
-    
+
+    # Security: Group role cache (short TTL bounds staleness across workers)
+    GROUP_ROLE_CACHE_TTL_SECONDS: int = 30
+
+    # Performance: Background jobs for large group operations
+    GROUP_BACKGROUND_THRESHOLD: int = int(os.getenv("GROUP_BACKGROUND_THRESHOLD", "500"))
+    JOB_CHUNK_SIZE: int = 200
+    JOB_MAX_CONCURRENT: int = 2
+    JOB_RETENTION_SECONDS: int = 3600
+    # Running jobs get this long to finish at shutdown before they are cancelled
+    JOB_SHUTDOWN_GRACE_SECONDS: float = 10.0
+
+    # Performance: Server-Sent Events for message notifications
+    SSE_HEARTBEAT_SECONDS: int = 15
+    SSE_QUEUE_SIZE: int = 100
+    SSE_MAX_CONNECTIONS_PER_USER: int = 5
+    SSE_REPLAY_LIMIT: int = 100
+    MESSAGE_COUNT_MAX_WAIT_SECONDS: int = 60
+    MAX_BULK_INVITATIONS: int = 100
+
+    # Performance: Retention of accepted/rejected messages
+    MESSAGE_RETENTION_DAYS: int = 30
+    MESSAGE_HISTORY_PER_USER: int = 200
+    MESSAGE_SWEEP_INTERVAL_SECONDS: int = 3600
+    MESSAGE_SWEEP_BATCH_SIZE: int = 1000
+
+    # Performance: Cross-worker event bus ("local", "unix" or "module:factory")
+    EVENT_BUS_BACKEND: str = os.getenv("EVENT_BUS_BACKEND", "unix")
+    # Empty: bus.sock in this deployment's private runtime directory
+    EVENT_BUS_SOCKET_PATH: str = os.getenv("EVENT_BUS_SOCKET_PATH", "")
+    EVENT_BUS_MAX_BUFFER_BYTES: int = 1024 * 1024
+    EVENT_BUS_RETRY_SECONDS: float = 0.5
+
+    # Performance: SQL instrumentation (X-DB-Queries/X-DB-Time headers in debug)
+    SQL_SLOW_QUERY_MS: int = int(os.getenv("SQL_SLOW_QUERY_MS", "200"))
+    SQL_N_PLUS_ONE_THRESHOLD: int = 5
+    SQL_STATS_HEADERS: bool = DEBUG
+
+    # Performance: Opt-in request profiling (X-Profile-Token header or sampling)
+    PROFILE_TOKEN: Optional[str] = os.getenv("PROFILE_TOKEN")
+    PROFILE_SAMPLE_RATE: float = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", "profiles")
+    PROFILE_MAX_FILES: int = 200
+
+    # Performance: Response compression (gzip; brotli/zstd when installed)
+    COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", "True").lower() == "true"
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
+    # Performance: MessagePack wire format (Accept / Content-Type: application/msgpack)
+    MSGPACK_ENABLED: bool = os.getenv("MSGPACK_ENABLED", "True").lower() == "true"
+    # Security: Larger MessagePack request bodies are rejected with 413
+    MSGPACK_MAX_BODY_BYTES: int = 1024 * 1024
+
+    # Performance: Cached health checks (/livez, /readyz)
+    HEALTH_CHECK_INTERVAL_SECONDS: float = 5.0
+    HEALTH_DB_TIMEOUT_SECONDS: float = 2.0
+    HEALTH_MAX_LOOP_LAG_MS: float = 500.0  # Not ready above this event-loop lag
+    HEALTH_MAX_POOL_SATURATION: float = 0.9  # Not ready above this share of pool + overflow in use
+
+    # Performance: Prometheus metrics at /metrics (only served to these clients)
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+    METRICS_ALLOWED_CLIENTS: list = ["127.0.0.1", "::1"]
+    # Security: Bearer token scrapers must send; /metrics is off without it
+    # (behind a reverse proxy every client address is loopback)
+    METRICS_TOKEN: Optional[str] = os.getenv("METRICS_TOKEN")
+
     # Security: Encryption
     ENCRYPTION_KEY: Optional[str] = os.getenv("ENCRYPTION_KEY")
     
     # Security: Logging
     LOG_LEVEL: str = "INFO"
     LOG_SECURITY_EVENTS: bool = True
+    # Performance: Fraction of successful requests logged; 4xx/5xx always kept
+    LOG_REQUEST_SAMPLE_RATE: float = float(os.getenv("LOG_REQUEST_SAMPLE_RATE", "0.1"))
+    LOG_QUEUE_SIZE: int = 10000
+    # Security: Persistent audit log of failed logins and 401/403 responses
+    AUDIT_BATCH_SIZE: int = 200
+    AUDIT_FLUSH_SECONDS: float = 2.0
+    AUDIT_MAX_BUFFER: int = 10000
     
     class Config:
         env_file = ".env"
@@ -90,3 +189,20 @@ class Settings(BaseSettings):
 
 settings = Settings()
 
+
+def runtime_path(name: str) -> str:
+    """
+    Path of a runtime file (event bus socket, shared rate limit table)
+    Security: The directory is keyed by the application directory and PORT,
+    so deployments and checkouts on one host never share state, and is
+    private to the user running the API (0700)
+    """
+    app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    key = hashlib.sha256(f"{app_dir}:{settings.PORT}".encode()).hexdigest()[:12]
+    directory = os.path.join(tempfile.gettempdir(), f"password-manager-{key}")
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    # Security: Refuse a directory someone else created or opened up
+    info = os.stat(directory)
+    if hasattr(os, "getuid") and (info.st_uid != os.getuid() or info.st_mode & 0o077):
+        raise RuntimeError(f"Runtime directory {directory} must be owned by this user with mode 0700")
+    return os.path.join(directory, name)
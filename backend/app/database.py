@@ -2,12 +2,22 @@
 Database connection and session management
 Security: SSL connections, connection pooling, parameterized queries
 """
-from sqlalchemy import create_engine, MetaData, text
+from fastapi import HTTPException, status
+from sqlalchemy import create_engine, MetaData, event, exc, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import settings
+from app.admission import db_admission
+from app.metrics import (
+    registry, db_pool_checkout_seconds, db_pool_checkout_timeouts_total,
+    db_pool_connects_total, db_pool_recycles_total, db_pool_invalidations_total,
+)
+from app.query_stats import instrument_engine
 import aiomysql
-from typing import AsyncGenerator
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator
 from urllib.parse import quote_plus
 
 # Security: Use SSL for database connections in production
@@ -19,9 +29,32 @@ DATABASE_URL = (
     f"@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}?charset=utf8mb4"
 )
 
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long each checkout waits
+    Performance: Exposed as db_pool_checkout_seconds on /metrics and fed to the
+    adaptive concurrency limit; timeouts are counted here, connection churn by
+    the pool event listeners below
+    """
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            db_pool_checkout_timeouts_total.inc()
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            db_pool_checkout_seconds.observe(waited)
+            db_admission.observe_wait(waited)
+
+
 # Security: Create async engine with pool settings for connection security
 engine = create_async_engine(
     DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
     pool_size=settings.DB_POOL_SIZE,
     max_overflow=settings.DB_MAX_OVERFLOW,
     pool_timeout=settings.DB_POOL_TIMEOUT,
@@ -30,10 +63,66 @@ engine = create_async_engine(
     future=True,
 )
 
+# Performance: Per-request query counts, slow-query log and N+1 detection
+instrument_engine(engine.sync_engine)
+
+# Performance: Count new DBAPI connections (first fill, overflow, recycles).
+# record_info outlives reconnects, so a second connect on the same pool entry
+# is a replacement: invalidated if flagged below (or by a pool-wide
+# invalidation), otherwise aged out by pool_recycle
+@event.listens_for(engine.sync_engine, "connect")
+def _count_connect(dbapi_connection, connection_record):
+    db_pool_connects_total.inc()
+    now = time.time()
+    previous = connection_record.record_info.get("connected_at")
+    connection_record.record_info["connected_at"] = now
+    if previous is None:
+        return
+    invalidated = connection_record.record_info.pop("invalidated", False)
+    aged = settings.DB_POOL_RECYCLE > -1 and now - previous > settings.DB_POOL_RECYCLE
+    db_pool_recycles_total.inc("age" if aged and not invalidated else "invalidated")
+
+
+@event.listens_for(engine.sync_engine, "invalidate")
+def _count_invalidate(dbapi_connection, connection_record, exception):
+    db_pool_invalidations_total.inc("hard")
+    connection_record.record_info["invalidated"] = True
+
+
+@event.listens_for(engine.sync_engine, "soft_invalidate")
+def _count_soft_invalidate(dbapi_connection, connection_record, exception):
+    db_pool_invalidations_total.inc("soft")
+    connection_record.record_info["invalidated"] = True
+
+
+# Performance: Pool usage read from engine.pool at scrape time
+registry.gauge("db_pool_size", "Configured connection pool size", func=lambda: engine.pool.size())
+registry.gauge("db_pool_checked_out", "Connections currently checked out", func=lambda: engine.pool.checkedout())
+registry.gauge("db_pool_checked_in", "Idle connections in the pool", func=lambda: engine.pool.checkedin())
+registry.gauge("db_pool_overflow", "Connections open beyond pool_size", func=lambda: max(engine.pool.overflow(), 0))
+
+class AdmittedSession(AsyncSession):
+    """
+    Session that frees its db_admission slot when it is closed
+    Performance: Streaming and long-poll handlers close their session before
+    they go idle; FastAPI tears get_db down only after the response is sent,
+    so holding the slot until then would starve DB-bound requests
+    """
+    holds_admission = False
+
+    async def close(self) -> None:
+        try:
+            await super().close()
+        finally:
+            if self.holds_admission:
+                self.holds_admission = False
+                db_admission.release()
+
+
 # Security: Session factory with proper isolation
 AsyncSessionLocal = async_sessionmaker(
     engine,
-    class_=AsyncSession,
+    class_=AdmittedSession,
     expire_on_commit=False,
     autocommit=False,
     autoflush=False,
@@ -43,13 +132,35 @@ AsyncSessionLocal = async_sessionmaker(
 Base = declarative_base()
 
 
+@asynccontextmanager
+async def admitted_session() -> AsyncIterator[AsyncSession]:
+    """
+    Short-lived session that takes its own db_admission slot
+    Performance: Fails fast with 503 rather than queueing for a pool
+    connection; the slot is released when the session closes
+    """
+    if not await db_admission.acquire():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Database busy, retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    session = AsyncSessionLocal()
+    session.holds_admission = True
+    async with session:
+        yield session
+
+
 # Security: Dependency for getting database session
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency function for getting database session
     Security: Proper session management and cleanup
+    Performance: Admitted by the adaptive concurrency limit (when enabled);
+    fails fast with 503 rather than queueing for a pool connection. The slot
+    is held until the session is closed, by the handler or at teardown
     """
-    async with AsyncSessionLocal() as session:
+    async with admitted_session() as session:
         try:
             yield session
             await session.commit()
@@ -7,7 +7,8 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.security import verify_token
-from app.models import User
+from app.models import User, Admin
+from app.cache import group_role_cache
 from sqlalchemy import select
 from typing import Optional
 
@@ -69,3 +70,58 @@ async def get_optional_user(
     except HTTPException:
         return None
 
+
+
+async def get_current_admin(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """
+    Get current user if it is a system administrator
+    Security: Users are administrators when an admins row links to their
+    user_id; names are never compared, since anyone can sign up with an
+    admin's username
+    """
+    result = await db.execute(
+        select(Admin.admin_id).where(Admin.user_id == current_user.user_id)
+    )
+    if result.first() is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Administrator access required",
+        )
+    return current_user
+
+
+async def ensure_group_admin(
+    db: AsyncSession,
+    user: User,
+    group_name: str,
+    detail: str = "Only group admins can perform this action",
+) -> None:
+    """
+    Raise 403 unless the user is admin of the group
+    Security: Served from the group role cache to avoid a DB round trip per check
+    """
+    if not await group_role_cache.is_admin(db, user.user_id, group_name):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=detail,
+        )
+
+
+def require_group_admin(detail: str = "Only group admins can perform this action"):
+    """
+    Build a dependency that authorizes the current user as admin of the
+    group named by the `group_name` path parameter
+    Security: Reusable admin check for group-scoped routes
+    """
+    async def dependency(
+        group_name: str,
+        current_user: User = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db),
+    ) -> User:
+        await ensure_group_admin(db, current_user, group_name, detail)
+        return current_user
+
+    return dependency
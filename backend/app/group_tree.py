@@ -0,0 +1,192 @@
+"""
+Nested group helpers backed by the group_closure table
+Security: Inherited membership flows from a group to all groups nested in it
+"""
+from typing import List, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import select, delete, update, union, and_, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import GroupClosure, GroupMember, GroupShare
+
+
+async def get_ancestors(db: AsyncSession, group_name: str) -> List[Tuple[str, int]]:
+    """Return (group, depth) for the group itself and every group it is nested in"""
+    result = await db.execute(
+        select(GroupClosure.ancestor, GroupClosure.depth).where(
+            GroupClosure.descendant == group_name
+        )
+    )
+    return [(group_name, 0)] + [(name, depth) for name, depth in result.all()]
+
+
+async def get_descendants(db: AsyncSession, group_name: str) -> List[Tuple[str, int]]:
+    """Return (group, depth) for the group itself and every group nested in it"""
+    result = await db.execute(
+        select(GroupClosure.descendant, GroupClosure.depth).where(
+            GroupClosure.ancestor == group_name
+        )
+    )
+    return [(group_name, 0)] + [(name, depth) for name, depth in result.all()]
+
+
+async def nest_group(db: AsyncSession, parent: str, child: str) -> None:
+    """
+    Nest child (with its subtree) under parent
+    Security: Rejects self-nesting, cycles and a second parent
+    """
+    if parent == child:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="A group cannot contain itself")
+
+    existing_parent = await db.execute(
+        select(GroupClosure.ancestor).where(
+            GroupClosure.descendant == child,
+            GroupClosure.depth == 1,
+        )
+    )
+    if existing_parent.first():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Group already has a parent")
+
+    descendants = await get_descendants(db, child)
+    if any(name == parent for name, _ in descendants):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Nesting would create a cycle")
+
+    ancestors = await get_ancestors(db, parent)
+    db.add_all([
+        GroupClosure(ancestor=ancestor, descendant=descendant, depth=up + down + 1)
+        for ancestor, up in ancestors
+        for descendant, down in descendants
+    ])
+
+
+async def unnest_group(db: AsyncSession, parent: str, child: str) -> None:
+    """Detach child (with its subtree) from parent and parent's ancestors"""
+    link = await db.execute(
+        select(GroupClosure.closure_id).where(
+            GroupClosure.ancestor == parent,
+            GroupClosure.descendant == child,
+            GroupClosure.depth == 1,
+        )
+    )
+    if link.first() is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group is not nested under parent")
+
+    ancestors = [name for name, _ in await get_ancestors(db, parent)]
+    descendants = [name for name, _ in await get_descendants(db, child)]
+    await db.execute(
+        delete(GroupClosure).where(
+            GroupClosure.ancestor.in_(ancestors),
+            GroupClosure.descendant.in_(descendants),
+        )
+    )
+
+
+async def rename_in_tree(db: AsyncSession, old_name: str, new_name: str) -> None:
+    """Carry nesting links and group-level shares over to a renamed group"""
+    await db.execute(
+        update(GroupClosure).where(GroupClosure.ancestor == old_name).values(ancestor=new_name)
+    )
+    await db.execute(
+        update(GroupClosure).where(GroupClosure.descendant == old_name).values(descendant=new_name)
+    )
+    await db.execute(
+        update(GroupShare).where(GroupShare.group_name == old_name).values(group_name=new_name)
+    )
+
+
+async def remove_from_tree(db: AsyncSession, group_name: str) -> None:
+    """
+    Remove a deleted group from the hierarchy and drop its group-level shares
+    Nested groups become top-level groups and keep their own subtrees
+    """
+    ancestors = [name for name, _ in await get_ancestors(db, group_name)]
+    descendants = [name for name, _ in await get_descendants(db, group_name)]
+    await db.execute(
+        delete(GroupClosure).where(
+            GroupClosure.ancestor.in_(ancestors),
+            GroupClosure.descendant.in_(descendants),
+        )
+    )
+    await db.execute(delete(GroupShare).where(GroupShare.group_name == group_name))
+
+
+async def unshare_from_group(db: AsyncSession, group_name: str, password_id: int) -> List[int]:
+    """
+    Drop a whole-group share of a password
+    Returns the members of nested groups that inherited it (empty when the
+    password was not shared with the group as a whole)
+    """
+    result = await db.execute(
+        delete(GroupShare).where(
+            GroupShare.group_name == group_name,
+            GroupShare.password_id == password_id,
+        )
+    )
+    if not result.rowcount:
+        return []
+    members = await db.execute(
+        select(GroupMember.user_id)
+        .join(GroupClosure, GroupClosure.descendant == GroupMember.group_name)
+        .where(and_(GroupClosure.ancestor == group_name, GroupClosure.depth > 0))
+        .distinct()
+    )
+    return list(members.scalars().all())
+
+
+def effective_groups_query(user_id: int):
+    """
+    Single query for every group a user belongs to directly or through nesting
+    Rows: (group_name, depth) where depth 0 is a direct membership
+    """
+    direct = select(
+        GroupMember.group_name.label("group_name"),
+        literal(0).label("depth"),
+    ).where(GroupMember.user_id == user_id)
+    inherited = (
+        select(
+            GroupClosure.ancestor.label("group_name"),
+            GroupClosure.depth.label("depth"),
+        )
+        .join(GroupMember, GroupMember.group_name == GroupClosure.descendant)
+        .where(GroupMember.user_id == user_id)
+    )
+    return union(direct, inherited)
+
+
+def password_viewers_query(password_id: int):
+    """
+    Single query for every user that can see a shared password:
+    members it was shared with directly, plus every member of a group
+    (or any group nested in it) it was shared with as a whole
+    """
+    direct = select(GroupMember.user_id.label("user_id")).where(
+        GroupMember.password_id == password_id
+    )
+    whole_group = (
+        select(GroupMember.user_id.label("user_id"))
+        .join(GroupShare, GroupShare.group_name == GroupMember.group_name)
+        .where(GroupShare.password_id == password_id)
+    )
+    nested = (
+        select(GroupMember.user_id.label("user_id"))
+        .join(GroupClosure, GroupClosure.descendant == GroupMember.group_name)
+        .join(GroupShare, GroupShare.group_name == GroupClosure.ancestor)
+        .where(GroupShare.password_id == password_id)
+    )
+    return union(direct, whole_group, nested)
+
+
+def inherited_shares_query(user_id: int):
+    """
+    Passwords shared as a whole with a group the user inherits membership of
+    Rows: (password_id, group_name) where group_name is the sharing ancestor
+    """
+    return (
+        select(
+            GroupShare.password_id.label("password_id"),
+            GroupShare.group_name.label("group_name"),
+        )
+        .select_from(GroupMember)
+        .join(GroupClosure, GroupClosure.descendant == GroupMember.group_name)
+        .join(GroupShare, GroupShare.group_name == GroupClosure.ancestor)
+        .where(and_(GroupMember.user_id == user_id, GroupClosure.depth > 0))
+    )
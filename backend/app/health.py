@@ -0,0 +1,141 @@
+"""
+Cached health status for liveness and readiness probes
+Performance: A background task checks the database, the connection pool and
+password hashing every HEALTH_CHECK_INTERVAL_SECONDS; probes read the cached
+result, so load balancer traffic never opens connections or transactions.
+Event-loop lag is sampled continuously: Argon2 hashing and other CPU-bound
+work run on the loop, so lag is where an overloaded worker shows up.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+from sqlalchemy import text
+from app.config import settings
+from app.database import engine
+from app.metrics import registry
+from app.security import pwd_context
+
+logger = logging.getLogger(__name__)
+
+# How often the loop-lag sampler wakes up
+LAG_SAMPLE_SECONDS = 0.5
+
+
+class HealthProber:
+    """Periodic background checks; probes only read the last snapshot"""
+
+    def __init__(self, interval_seconds: float, db_timeout: float, max_loop_lag_ms: float, max_pool_saturation: float):
+        self.interval_seconds = interval_seconds
+        self.db_timeout = db_timeout
+        self.max_loop_lag_ms = max_loop_lag_ms
+        self.max_pool_saturation = max_pool_saturation
+        self.loop_lag = 0.0  # seconds, worst sample since the last refresh
+        self._max_lag = 0.0
+        self._status: Dict[str, Any] = {"ready": False, "status": "starting"}
+        self._checked_at: Optional[float] = None
+        self._tasks: list = []
+
+    async def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._run()), asyncio.create_task(self._sample_lag())]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Health check failed: {e}", exc_info=True)
+            await asyncio.sleep(self.interval_seconds)
+
+    async def _sample_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(LAG_SAMPLE_SECONDS)
+            lag = max(loop.time() - start - LAG_SAMPLE_SECONDS, 0.0)
+            self._max_lag = max(self._max_lag, lag)
+
+    @staticmethod
+    async def _select_one() -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def _check_database(self) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            # Bounds connecting as well as the query
+            await asyncio.wait_for(self._select_one(), self.db_timeout)
+        except Exception as e:
+            # Security: Report the error class only, never connection details
+            return {"ok": False, "error": type(e).__name__}
+        return {"ok": True, "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+    @staticmethod
+    def _pool_status() -> Dict[str, Any]:
+        pool = engine.pool
+        capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+        checked_out = pool.checkedout()
+        return {
+            "size": pool.size(),
+            "checked_out": checked_out,
+            "overflow": max(pool.overflow(), 0),
+            "saturation": round(checked_out / capacity, 3) if capacity else 0.0,
+        }
+
+    @staticmethod
+    def _hashing_status() -> Dict[str, Any]:
+        # Backend availability only; computing a probe hash would stall the loop
+        handler = pwd_context.handler()
+        try:
+            handler.get_backend()
+        except Exception as e:
+            return {"ok": False, "scheme": handler.name, "error": type(e).__name__}
+        return {"ok": True, "scheme": handler.name}
+
+    async def refresh(self) -> Dict[str, Any]:
+        """Run all checks and replace the cached snapshot"""
+        database = await self._check_database()
+        pool = self._pool_status()
+        hashing = self._hashing_status()
+        self.loop_lag, self._max_lag = self._max_lag, 0.0
+        lag_ms = round(self.loop_lag * 1000, 2)
+
+        ready = (
+            database["ok"]
+            and hashing["ok"]
+            and pool["saturation"] < self.max_pool_saturation
+            and lag_ms < self.max_loop_lag_ms
+        )
+        self._status = {
+            "ready": ready,
+            "status": "ready" if ready else "degraded",
+            "database": database,
+            "pool": pool,
+            "hashing": hashing,
+            "event_loop_lag_ms": lag_ms,
+        }
+        self._checked_at = time.monotonic()
+        return self._status
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Last cached status with its age; no I/O"""
+        age = None if self._checked_at is None else round(time.monotonic() - self._checked_at, 2)
+        return {**self._status, "checked_seconds_ago": age}
+
+
+health_prober = HealthProber(
+    interval_seconds=settings.HEALTH_CHECK_INTERVAL_SECONDS,
+    db_timeout=settings.HEALTH_DB_TIMEOUT_SECONDS,
+    max_loop_lag_ms=settings.HEALTH_MAX_LOOP_LAG_MS,
+    max_pool_saturation=settings.HEALTH_MAX_POOL_SATURATION,
+)
+
+# Performance: Worst event-loop lag over the last health interval
+registry.gauge("event_loop_lag_seconds", "Worst event-loop lag over the last health check interval",
+               func=lambda: health_prober.loop_lag)
@@ -0,0 +1,277 @@
+"""
+Background job runner with job status persisted in the database
+Performance: Large group operations run as chunked, short transactions
+Security: Job rows (background_jobs) are readable from every worker; each
+chunk commits its progress together with its changes, and jobs interrupted
+by shutdown are recorded as failed so clients can retry them
+"""
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.group_tree import remove_from_tree
+from app.models import BackgroundJob, GroupMember
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+
+@dataclass
+class Job:
+    """Background job state exposed through the job-status endpoint"""
+    job_id: str
+    kind: str
+    owner_id: int
+    total: int
+    processed: int = 0
+    status: str = JOB_QUEUED
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @classmethod
+    def from_row(cls, row: BackgroundJob) -> "Job":
+        return cls(
+            job_id=row.job_id,
+            kind=row.kind,
+            owner_id=row.owner_id,
+            total=row.total,
+            processed=row.processed,
+            status=row.status,
+            error=row.error,
+            created_at=_to_timestamp(row.created_at),
+            finished_at=_to_timestamp(row.finished_at) if row.finished_at else None,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "total": self.total,
+            "processed": self.processed,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+    async def advance(self, session: AsyncSession, count: int) -> None:
+        """Record `count` more processed items in the chunk's own transaction"""
+        self.processed += count
+        await session.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.job_id == self.job_id)
+            .values(processed=self.processed)
+        )
+
+
+def _to_timestamp(value: datetime) -> float:
+    # Stored as naive UTC, like every other timestamp column
+    return (value - datetime(1970, 1, 1)).total_seconds()
+
+
+def _to_datetime(timestamp: float) -> datetime:
+    return datetime.utcfromtimestamp(timestamp)
+
+
+JobFunc = Callable[[Job], Awaitable[None]]
+
+
+class JobRunner:
+    """
+    Runs jobs as asyncio tasks in the current worker
+    Security: Job status is only visible to the user that started it
+    """
+
+    def __init__(self, max_concurrent: int, retention_seconds: int, shutdown_grace_seconds: float):
+        self.retention_seconds = retention_seconds
+        self.shutdown_grace_seconds = shutdown_grace_seconds
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    async def submit(self, kind: str, owner_id: int, total: int, func: JobFunc) -> Job:
+        """Persist a queued job and schedule it on the running event loop"""
+        job = Job(job_id=uuid.uuid4().hex, kind=kind, owner_id=owner_id, total=total)
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                await self._prune(session)
+                session.add(BackgroundJob(
+                    job_id=job.job_id,
+                    kind=job.kind,
+                    owner_id=job.owner_id,
+                    status=job.status,
+                    total=job.total,
+                    processed=0,
+                    created_at=_to_datetime(job.created_at),
+                ))
+        task = asyncio.create_task(self._run(job, func))
+        self._tasks[job.job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.job_id, None))
+        return job
+
+    async def get(self, db: AsyncSession, job_id: str, owner_id: int) -> Optional[Job]:
+        """Look up a job owned by the given user (started on any worker)"""
+        result = await db.execute(
+            select(BackgroundJob).where(
+                BackgroundJob.job_id == job_id,
+                BackgroundJob.owner_id == owner_id,
+            )
+        )
+        row = result.scalar_one_or_none()
+        return None if row is None else Job.from_row(row)
+
+    async def shutdown(self) -> None:
+        """
+        Give running jobs shutdown_grace_seconds to finish, then cancel the
+        rest; committed chunks are kept and cancelled jobs are recorded as failed
+        """
+        tasks = list(self._tasks.values())
+        if not tasks:
+            return
+        _, pending = await asyncio.wait(tasks, timeout=self.shutdown_grace_seconds)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _run(self, job: Job, func: JobFunc) -> None:
+        try:
+            async with self._semaphore:
+                job.status = JOB_RUNNING
+                await self._save(job)
+                await func(job)
+            job.status = JOB_COMPLETED
+        except asyncio.CancelledError:
+            job.status = JOB_FAILED
+            job.error = "Interrupted by server shutdown; retry the request"
+            raise
+        except Exception as e:
+            logger.error(f"Job {job.job_id} ({job.kind}) failed: {e}", exc_info=True)
+            job.status = JOB_FAILED
+            job.error = "Job failed" if not settings.DEBUG else str(e)[:255]
+        finally:
+            job.finished_at = time.time()
+            await self._save(job)
+
+    @staticmethod
+    async def _save(job: Job) -> None:
+        """Write status, error and finish time of a job"""
+        try:
+            async with AsyncSessionLocal() as session:
+                async with session.begin():
+                    await session.execute(
+                        update(BackgroundJob)
+                        .where(BackgroundJob.job_id == job.job_id)
+                        .values(
+                            status=job.status,
+                            processed=job.processed,
+                            error=job.error,
+                            finished_at=_to_datetime(job.finished_at) if job.finished_at else None,
+                        )
+                    )
+        except Exception as e:
+            logger.error(f"Could not save job {job.job_id} status: {e}")
+
+    async def _prune(self, session: AsyncSession) -> None:
+        cutoff = _to_datetime(time.time() - self.retention_seconds)
+        await session.execute(delete(BackgroundJob).where(BackgroundJob.finished_at < cutoff))
+
+
+job_runner = JobRunner(
+    max_concurrent=settings.JOB_MAX_CONCURRENT,
+    retention_seconds=settings.JOB_RETENTION_SECONDS,
+    shutdown_grace_seconds=settings.JOB_SHUTDOWN_GRACE_SECONDS,
+)
+
+
+async def _member_id_chunks(group_name: str, chunk_size: int):
+    """
+    Yield member user_id chunks of a group in keyset order
+    Each chunk is read in its own short-lived session
+    """
+    last_user_id = 0
+    while True:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(GroupMember.user_id)
+                .where(
+                    GroupMember.group_name == group_name,
+                    GroupMember.user_id > last_user_id,
+                )
+                .order_by(GroupMember.user_id)
+                .limit(chunk_size)
+            )
+            user_ids: List[int] = list(result.scalars().all())
+        if not user_ids:
+            return
+        last_user_id = user_ids[-1]
+        yield user_ids
+
+
+def share_to_all_job(group_name: str, password_id: int) -> JobFunc:
+    """Build a job that sets password_id on every membership in small transactions"""
+    async def run(job: Job) -> None:
+        async for user_ids in _member_id_chunks(group_name, settings.JOB_CHUNK_SIZE):
+            async with AsyncSessionLocal() as session:
+                async with session.begin():
+                    await session.execute(
+                        update(GroupMember)
+                        .where(
+                            GroupMember.group_name == group_name,
+                            GroupMember.user_id.in_(user_ids),
+                        )
+                        .values(password_id=password_id)
+                    )
+                    await job.advance(session, len(user_ids))
+            await asyncio.sleep(0)
+
+    return run
+
+
+def delete_group_job(group_name: str, invalidate: Optional[Callable[[], None]] = None) -> JobFunc:
+    """
+    Build a job that removes every membership of a group in small transactions,
+    then its nesting links and group-level shares in a final one
+    Security: invalidate (the role cache) runs after every committed chunk, so
+    removed members lose cached roles even if the job stops partway; the tree
+    is only dropped once no members are left, so an interrupted job leaves a
+    consistent group that can be deleted again
+    """
+    async def run(job: Job) -> None:
+        while True:
+            async with AsyncSessionLocal() as session:
+                async with session.begin():
+                    result = await session.execute(
+                        select(GroupMember.user_id)
+                        .where(GroupMember.group_name == group_name)
+                        .order_by(GroupMember.user_id)
+                        .limit(settings.JOB_CHUNK_SIZE)
+                    )
+                    user_ids = list(result.scalars().all())
+                    if not user_ids:
+                        await remove_from_tree(session, group_name)
+                    else:
+                        await session.execute(
+                            delete(GroupMember).where(
+                                GroupMember.group_name == group_name,
+                                GroupMember.user_id.in_(user_ids),
+                            )
+                        )
+                        await job.advance(session, len(user_ids))
+            if invalidate is not None:
+                invalidate()
+            if not user_ids:
+                return
+            await asyncio.sleep(0)
+
+    return run
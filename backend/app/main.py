@@ -2,24 +2,34 @@
 FastAPI Main Application
 Security: Comprehensive security configuration and middleware
 """
+import time
+
+# Performance: Import time of the application is part of the startup report
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from fastapi.encoders import jsonable_encoder
 from app.config import settings
-from app.database import test_connection
+from app.jobs import job_runner
+from app.bus import event_bus
+from app.retention import message_sweeper
+from app.audit import audit_sink
+from app.health import health_prober
 from app.middleware import setup_middleware
-from app.routers import auth, passwords, groups, security, faqs, messages
+from app.responses import NegotiatedResponse
+from app.logging_config import setup_logging, stop_logging
+from app.warmup import warm_up
+from app.routers import auth, passwords, groups, security, faqs, messages, jobs, audit
+from app.routers import metrics as metrics_router
 from app.routers import users as users_router
-import uvicorn
 import logging
 
-# Security: Configure logging
-logging.basicConfig(
-    level=getattr(logging, settings.LOG_LEVEL),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Security: Configure logging (structured JSON, written off the event loop)
+setup_logging()
 
 # Security: Create FastAPI app with security settings
 app = FastAPI(
@@ -28,6 +38,7 @@ app = FastAPI(
     description="Secure Password Manager API with comprehensive security measures",
     docs_url="/docs" if settings.DEBUG else None,  # Security: Disable docs in production
     redoc_url="/redoc" if settings.DEBUG else None,  # Security: Disable redoc in production
+    default_response_class=NegotiatedResponse,  # Performance: orjson (or MessagePack) rendering
 )
 
 # Security: Setup middleware
@@ -41,12 +52,13 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     Custom HTTP exception handler
     Security: Generic error messages to prevent information leakage
     """
-    return JSONResponse(
+    return NegotiatedResponse(
         status_code=exc.status_code,
         content={
             "error": exc.detail if settings.DEBUG else "An error occurred",
             "status_code": exc.status_code
-        }
+        },
+        headers=getattr(exc, "headers", None)
     )
 
 
@@ -59,7 +71,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     details = exc.errors() if settings.DEBUG else "Invalid input"
     safe_details = jsonable_encoder(details)
 
-    return JSONResponse(
+    return NegotiatedResponse(
         status_code=422,
         content={
             "error": "Validation error",
@@ -68,6 +80,19 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     )
 
 
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    """
+    Connection pool exhausted for DB_POOL_TIMEOUT seconds
+    Performance: 503 with Retry-After (overload), not a generic 500
+    """
+    return NegotiatedResponse(
+        status_code=503,
+        content={"error": "Service busy", "status_code": 503},
+        headers={"Retry-After": "1"}
+    )
+
+
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
     """
@@ -86,8 +111,12 @@ async def general_exception_handler(request: Request, exc: Exception):
 # Security: Health check endpoint
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    db_status = await test_connection()
+    """
+    Health check endpoint
+    Performance: Served from the cached background check (no database I/O)
+    """
+    status = health_prober.snapshot()
+    db_status = status.get("database", {}).get("ok", False)
     return {
         "status": "healthy" if db_status else "unhealthy",
         "database": "connected" if db_status else "disconnected",
@@ -95,6 +124,24 @@ async def health_check():
     }
 
 
+# Performance: Liveness probe; never touches I/O
+@app.get("/livez")
+async def liveness_check():
+    """Liveness probe: the worker's event loop is serving requests"""
+    return {"status": "alive"}
+
+
+# Performance: Readiness probe from the cached background check
+@app.get("/readyz")
+async def readiness_check():
+    """
+    Readiness probe: database, pool saturation, hashing and event-loop lag
+    Returns 503 while starting or degraded
+    """
+    status = health_prober.snapshot()
+    return NegotiatedResponse(status, status_code=200 if status["ready"] else 503)
+
+
 # Security: Include routers
 app.include_router(auth.router)
 app.include_router(passwords.router)
@@ -103,6 +150,11 @@ app.include_router(security.router)
 app.include_router(faqs.router)
 app.include_router(messages.router)
 app.include_router(users_router.router)
+app.include_router(jobs.router)
+app.include_router(audit.router)
+app.include_router(metrics_router.router)
+
+import_ms = round((time.perf_counter() - _import_started) * 1000, 1)
 
 
 # Security: Startup event
@@ -115,16 +167,49 @@ async def startup_event():
     print(f"Version: {settings.VERSION}")
     print(f"Environment: {'Development' if settings.DEBUG else 'Production'}")
     
-    # Security: Test database connection
-    db_connected = await test_connection()
-    if not db_connected:
+    started = time.perf_counter()
+    
+    # Performance: Open the pool and warm hot query shapes before taking traffic
+    report = await warm_up()
+    print(f"Database pool: {report['pool_connections']}/{report['pool_size']} connections open")
+    if not report["pool_connections"]:
         print("⚠️  WARNING: Database connection failed!")
     
+    # Performance: Join the cross-worker event bus
+    await event_bus.start()
+    print(f"Event bus: {settings.EVENT_BUS_BACKEND}")
+    
+    # Performance: Expire and cap processed messages in the background
+    await message_sweeper.start()
+    
+    # Security: Batched writer for the security audit log
+    await audit_sink.start()
+    
+    # Performance: Background health checks served by /health and /readyz
+    await health_prober.start()
+    
+    # Performance: Cold-start report (import time is measured once per process)
+    report.update(import_ms=import_ms, startup_ms=round((time.perf_counter() - started) * 1000, 1))
+    logging.getLogger("app.startup").info("Startup complete", extra={"event": report})
+    print(f"Startup: import {import_ms} ms, warm-up {report['warmup_ms']} ms, total {report['startup_ms']} ms")
+    
     print("=" * 50)
     print("✅ API is ready to accept requests")
     print("=" * 50)
 
 
+# Security: Shutdown event
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Shutdown event: stop background jobs and leave the event bus"""
+    await health_prober.stop()
+    await message_sweeper.stop()
+    await audit_sink.stop()
+    await job_runner.shutdown()
+    await event_bus.stop()
+    stop_logging()
+
+
 # Security: Root endpoint
 @app.get("/")
 async def root():
@@ -137,6 +222,9 @@ async def root():
 
 
 if __name__ == "__main__":
+    # Performance: Only needed when run directly (production uses app.server)
+    import uvicorn
+
     # Security: Run with uvicorn
     uvicorn.run(
         "app.main:app",
@@ -0,0 +1,263 @@
+"""
+In-process metrics in Prometheus text format
+Performance: Plain dict/list updates on the event loop thread, no locks and no
+external client library; values are only formatted when /metrics is scraped
+Metrics are per worker process. Workers of app.server share one listening
+socket, so each scrape is answered by whichever worker accepts it; every
+series therefore carries a `pid` label, keeping each worker's counters
+monotonic. Aggregate across workers in queries, e.g.
+sum without (pid) (rate(http_requests_total[5m])).
+"""
+import math
+import os
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+# (names, values) of labels added to every series at render time
+ConstLabels = Tuple[Tuple[str, ...], LabelValues]
+NO_LABELS: ConstLabels = ((), ())
+
+# Seconds; covers fast cache hits up to slow password hashing and pool waits
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Metric:
+    """Base class: name, help text and label names"""
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def render(self, const: ConstLabels = NO_LABELS) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    """Monotonically increasing value per label set"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(labelvalues, 0.0)
+
+    def render(self, const: ConstLabels = NO_LABELS) -> List[str]:
+        lines = super().render(const)
+        names = const[0] + self.labelnames
+        for labelvalues, value in list(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(names, const[1] + labelvalues)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Metric):
+    """
+    Value that goes up and down per label set
+    A gauge built with func (and no labels) is read at scrape time instead
+    """
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        func: Optional[Callable[[], float]] = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._func = func
+
+    def set(self, value: float, *labelvalues: str) -> None:
+        self._values[labelvalues] = value
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def dec(self, *labelvalues: str, amount: float = 1.0) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+    def value(self, *labelvalues: str) -> float:
+        if self._func is not None:
+            return float(self._func())
+        return self._values.get(labelvalues, 0.0)
+
+    def render(self, const: ConstLabels = NO_LABELS) -> List[str]:
+        lines = super().render(const)
+        if self._func is not None:
+            try:
+                lines.append(f"{self.name}{_format_labels(*const)} {_format_value(self._func())}")
+            except Exception:
+                # A failing callback must not break the whole scrape
+                pass
+            return lines
+        names = const[0] + self.labelnames
+        for labelvalues, value in list(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(names, const[1] + labelvalues)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(Metric):
+    """Cumulative bucketed observations per label set"""
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labelvalues -> [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = self._series[labelvalues] = ([0] * (len(self.buckets) + 1), [0.0])
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1][0] += value
+
+    def count(self, *labelvalues: str) -> int:
+        series = self._series.get(labelvalues)
+        return sum(series[0]) if series else 0
+
+    def render(self, const: ConstLabels = NO_LABELS) -> List[str]:
+        lines = super().render(const)
+        names = const[0] + self.labelnames
+        for labelvalues, (counts, total) in list(self._series.items()):
+            labelvalues = const[1] + labelvalues
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                labels = _format_labels(names + ("le",), labelvalues + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(names, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together for a scrape"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        func: Optional[Callable[[], float]] = None,
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, func))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        # Read at scrape time: workers are forked after this module is imported
+        const: ConstLabels = (("pid",), (str(os.getpid()),))
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render(const))
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# HTTP
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP requests by method, route template and status",
+    ("method", "route", "status"),
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by method and route template",
+    ("method", "route"),
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled",
+)
+
+# Database pool (usage gauges are registered by app.database)
+db_pool_checkout_seconds = registry.histogram(
+    "db_pool_checkout_seconds", "Time spent waiting to check a connection out of the pool",
+    # Uncontended checkouts take microseconds; exhausted pools wait up to DB_POOL_TIMEOUT
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+db_pool_checkout_timeouts_total = registry.counter(
+    "db_pool_checkout_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT",
+)
+db_pool_connects_total = registry.counter(
+    "db_pool_connects_total", "New database connections opened by the pool",
+)
+db_pool_recycles_total = registry.counter(
+    "db_pool_recycles_total", "Connections replaced at checkout by reason (age or invalidated)",
+    ("reason",),
+)
+db_pool_invalidations_total = registry.counter(
+    "db_pool_invalidations_total", "Pooled connections invalidated by kind (hard or soft)",
+    ("kind",),
+)
+
+# Adaptive DB concurrency (usage gauges are registered by app.admission)
+db_admission_rejected_total = registry.counter(
+    "db_admission_rejected_total", "DB-bound requests rejected with 503 by the adaptive concurrency limit",
+)
+
+# Password hashing
+password_hash_seconds = registry.histogram(
+    "password_hash_seconds", "Password hashing and verification latency",
+    ("operation",),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+# Caches
+cache_requests_total = registry.counter(
+    "cache_requests_total", "Cache lookups by cache and result (hit or miss)",
+    ("cache", "result"),
+)
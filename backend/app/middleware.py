@@ -2,93 +2,479 @@
 Security middleware for FastAPI
 Security: CORS, security headers, rate limiting, request logging
 """
-from fastapi import Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+import asyncio
+import logging
 import time
+import orjson
 from app.config import settings
+from app.logging_config import access_logger, security_logger
+from app.audit import audit_sink
+from app.compression import CODECS, codec_level, negotiate
+from app.responses import MSGPACK_MEDIA_TYPES, msgpack, wants_msgpack, wire_format
+from app.profiling import PROFILE_BY_TOKEN, profile_trigger, request_profiler, user_bucket
+from app.query_stats import begin_request, end_request, current_stats, report_n_plus_one
+from app.metrics import (
+    http_requests_total, http_request_duration_seconds, http_requests_in_flight
+)
+from app.models import SECURITY_EVENT_AUTH_FAILED
+from app.rate_limit import limiter
 
-# Security: Rate limiting
-limiter = Limiter(key_func=get_remote_address)
 
+# Security: Headers added to every response, encoded once at import time
+SECURITY_HEADERS: List[Tuple[bytes, bytes]] = [
+    # Security: Strict-Transport-Security (HSTS)
+    (b"strict-transport-security", b"max-age=31536000; includeSubDomains"),
+    # Security: X-Content-Type-Options
+    (b"x-content-type-options", b"nosniff"),
+    # Security: X-Frame-Options (clickjacking protection)
+    (b"x-frame-options", b"DENY"),
+    # Security: X-XSS-Protection
+    (b"x-xss-protection", b"1; mode=block"),
+    # Security: Content-Security-Policy
+    (
+        b"content-security-policy",
+        b"default-src 'self'; "
+        b"script-src 'self'; "
+        b"style-src 'self' 'unsafe-inline'; "
+        b"img-src 'self' data:; "
+        b"font-src 'self'; "
+        b"connect-src 'self'; "
+        b"frame-ancestors 'none';",
+    ),
+    # Security: Referrer-Policy
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+    # Security: Permissions-Policy
+    (
+        b"permissions-policy",
+        b"geolocation=(), "
+        b"microphone=(), "
+        b"camera=(), "
+        b"payment=(), "
+        b"usb=()",
+    ),
+]
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+# Security: Response headers replaced by SECURITY_HEADERS, plus the server header
+_REPLACED_HEADERS = frozenset([name for name, _ in SECURITY_HEADERS] + [b"server"])
+
+
+def _client_host(scope: Scope) -> str:
+    """Client address as app.rate_limit.get_remote_address reports it"""
+    client = scope.get("client")
+    return client[0] if client else "127.0.0.1"
+
+
+class SecurityHeadersMiddleware:
     """
     Add security headers to all responses
     Security: Defense against various attacks
+    Performance: Pure ASGI; injects a precomputed header block into
+    http.response.start and leaves streaming bodies untouched
     """
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        
-        # Security: Strict-Transport-Security (HSTS)
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        
-        # Security: X-Content-Type-Options
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        
-        # Security: X-Frame-Options (clickjacking protection)
-        response.headers["X-Frame-Options"] = "DENY"
-        
-        # Security: X-XSS-Protection
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        
-        # Security: Content-Security-Policy
-        response.headers["Content-Security-Policy"] = (
-            "default-src 'self'; "
-            "script-src 'self'; "
-            "style-src 'self' 'unsafe-inline'; "
-            "img-src 'self' data:; "
-            "font-src 'self'; "
-            "connect-src 'self'; "
-            "frame-ancestors 'none';"
-        )
-        
-        # Security: Referrer-Policy
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        
-        # Security: Permissions-Policy
-        response.headers["Permissions-Policy"] = (
-            "geolocation=(), "
-            "microphone=(), "
-            "camera=(), "
-            "payment=(), "
-            "usb=()"
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                headers = [
+                    (name, value)
+                    for name, value in message.get("headers", [])
+                    if name.lower() not in _REPLACED_HEADERS
+                ]
+                headers.extend(SECURITY_HEADERS)
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+# Routes that audit their own 401s (as login_failed, with the username)
+SELF_AUDITED_PATHS = frozenset({"/api/auth/login"})
+
+
+def _log_request(scope: Scope, status_code: int, process_time: float) -> None:
+    """Enqueue one structured record per request (see app.logging_config)"""
+    event = {
+        "event": "request",
+        "method": scope["method"],
+        "path": scope["path"],
+        "status": status_code,
+        "duration_ms": round(process_time * 1000, 2),
+        "client": _client_host(scope),
+    }
+    # Security: Failed authentication attempts are always logged, except
+    # where the route records them itself with more detail
+    if status_code in (401, 403) and scope["path"] not in SELF_AUDITED_PATHS:
+        event["event"] = "auth_failed"
+        security_logger.warning("Failed authentication", extra={"event": event})
+        audit_sink.record(
+            SECURITY_EVENT_AUTH_FAILED,
+            client_ip=event["client"],
+            method=event["method"],
+            path=event["path"][:500],
+            status_code=status_code,
         )
-        
-        # Security: Remove server header
-        if "server" in response.headers:
-            del response.headers["server"]
-        
-        return response
+    elif settings.LOG_SECURITY_EVENTS:
+        # Performance: Successful requests are sampled; errors are always kept
+        level = logging.WARNING if status_code >= 400 else logging.INFO
+        access_logger.log(level, "Request", extra={"event": event})
 
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
+class RequestLoggingMiddleware:
     """
     Log security-relevant requests
     Security: Audit trail for security events
+    Performance: Pure ASGI; no extra task or memory stream per request
     """
-    async def dispatch(self, request: Request, call_next):
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         start_time = time.time()
-        
-        # Log request
-        if settings.LOG_SECURITY_EVENTS:
-            print(f"[SECURITY] {request.method} {request.url.path} from {get_remote_address(request)}")
-        
-        response = await call_next(request)
-        
-        process_time = time.time() - start_time
-        response.headers["X-Process-Time"] = str(process_time)
-        
-        # Security: Log failed authentication attempts
-        if response.status_code == 401 or response.status_code == 403:
-            print(f"[SECURITY ALERT] Failed authentication: {request.method} {request.url.path} from {get_remote_address(request)}")
-        
-        return response
+
+        async def send_with_timing(message: Message):
+            if message["type"] == "http.response.start":
+                process_time = time.time() - start_time
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-process-time", str(process_time).encode())
+                ]
+                _log_request(scope, message["status"], process_time)
+            await send(message)
+
+        await self.app(scope, receive, send_with_timing)
+
+
+# endpoint -> route template, filled lazily from the application routes
+_route_paths: Dict[Any, str] = {}
+
+
+def route_template(scope: Scope) -> str:
+    """Route template (e.g. /api/jobs/{job_id}) of a routed request, or "unmatched" """
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    path = _route_paths.get(endpoint)
+    if path is None:
+        for route in getattr(scope.get("app"), "routes", ()):
+            route_endpoint = getattr(route, "endpoint", None)
+            if route_endpoint is not None:
+                _route_paths.setdefault(route_endpoint, getattr(route, "path", "unmatched"))
+        path = _route_paths.setdefault(endpoint, "unmatched")
+    return path
+
+
+class MetricsMiddleware:
+    """
+    Record per-route request counts, latency and in-flight requests
+    Performance: Pure ASGI; labels use the route template (not the raw path)
+    so series cardinality stays bounded
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec()
+            route = route_template(scope)
+            method = scope["method"]
+            http_requests_total.inc(method, route, str(status_code))
+            http_request_duration_seconds.observe(time.perf_counter() - start_time, method, route)
+
+
+class QueryStatsMiddleware:
+    """
+    Count SQL queries and database time per request (see app.query_stats)
+    Performance: Adds X-DB-Queries/X-DB-Time when SQL_STATS_HEADERS is on and
+    logs statements repeated within one request as suspected N+1 patterns
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = begin_request()
+        stats = current_stats()
+
+        async def send_with_stats(message: Message):
+            if message["type"] == "http.response.start" and settings.SQL_STATS_HEADERS:
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-db-queries", str(stats.count).encode()),
+                    (b"x-db-time", f"{stats.total_time:.6f}".encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            end_request(token)
+            report_n_plus_one(stats, scope["method"], scope["path"])
+
+
+class ProfilerMiddleware:
+    """
+    Capture a cProfile profile of single requests (see app.profiling)
+    Security: Only requests with the admin profile token, or sampled ones,
+    are profiled; the token-triggered response carries X-Profile-Id
+    Performance: The profile is written to disk in a thread after the response
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        trigger = profile_trigger(scope["headers"]) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profiler = request_profiler.start()
+        if profiler is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = request_profiler.store.new_id()
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_with_profile_id(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # Security: Sampled requests belong to ordinary clients; only
+                # the token holder learns the profile id
+                if trigger == PROFILE_BY_TOKEN:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-profile-id", profile_id.encode())
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            request_profiler.stop(profiler)
+            meta = {
+                "method": scope["method"],
+                "route": route_template(scope),
+                "path": scope["path"],
+                "status": status_code,
+                "duration_ms": round((time.perf_counter() - start_time) * 1000, 2),
+                "user_bucket": user_bucket(scope["headers"]),
+                "captured_at": datetime.utcnow().isoformat(),
+            }
+            try:
+                await asyncio.to_thread(request_profiler.store.save, profile_id, profiler, meta)
+            except OSError as e:
+                logging.getLogger(__name__).error(f"Saving request profile failed: {e}")
+
+
+# Performance: Media types worth compressing (text/event-stream is excluded
+# so Server-Sent Events are never buffered by a compressor)
+COMPRESSIBLE_TYPES = (
+    "application/json", "application/msgpack", "text/plain", "text/html", "text/css", "application/javascript",
+)
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with the best content-coding the client accepts
+    Performance: Negotiated from Accept-Encoding (br, zstd, gzip; see
+    app.compression); bodies under minimum_size are sent as-is, and streaming
+    bodies are compressed chunk by chunk without buffering
+    Security: Clients authenticate with bearer tokens rather than cookies, so
+    responses are not exposed to cross-site compression oracles (BREACH)
+    """
+    def __init__(self, app: ASGIApp, minimum_size: int):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = next(
+            (value.decode("latin-1") for name, value in scope["headers"] if name == b"accept-encoding"),
+            None,
+        )
+        encoding = negotiate(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message.get("headers", []))
+                content_type = headers.get("content-type", "")
+                if (
+                    "content-encoding" in headers
+                    or message["status"] in (204, 304)
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Hold the start message until the first body chunk shows the size
+                    start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                headers = MutableHeaders(scope=start_message)
+                headers.add_vary_header("Accept-Encoding")
+                if not more_body and len(body) < self.minimum_size:
+                    # Performance: Small responses are cheaper to send uncompressed
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                compressor = CODECS[encoding](codec_level(encoding))
+                headers["Content-Encoding"] = encoding
+                if not more_body:
+                    data = compressor.compress(body) + compressor.flush()
+                    headers["Content-Length"] = str(len(data))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": data})
+                    return
+                # Streaming: the final length is unknown
+                del headers["Content-Length"]
+                await send(start_message)
+
+            data = compressor.compress(body)
+            if not more_body:
+                data += compressor.flush()
+            if data or not more_body:
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+class MessagePackMiddleware:
+    """
+    MessagePack wire format for every router
+    Performance: `Content-Type: application/msgpack` request bodies are
+    transcoded to JSON before routing, so handlers and request models are
+    unchanged; the Accept header selects the response format rendered by
+    NegotiatedResponse (see app.responses)
+    Security: Bodies are buffered up to max_body_bytes; larger ones get 413
+    """
+    def __init__(self, app: ASGIApp, max_body_bytes: int):
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = content_type = content_length = None
+        for name, value in scope["headers"]:
+            if name == b"accept":
+                accept = value.decode("latin-1")
+            elif name == b"content-type":
+                content_type = value.decode("latin-1")
+            elif name == b"content-length":
+                content_length = value
+
+        if content_type and content_type.split(";")[0].strip().lower() in MSGPACK_MEDIA_TYPES:
+            too_large = (
+                content_length is not None
+                and content_length.isdigit()
+                and int(content_length) > self.max_body_bytes
+            )
+            body = bytearray()
+            more_body = not too_large
+            while more_body:
+                message = await receive()
+                if message["type"] != "http.request":
+                    return
+                body += message.get("body", b"")
+                more_body = message.get("more_body", False)
+                if len(body) > self.max_body_bytes:
+                    too_large = True
+                    break
+            if too_large:
+                response = JSONResponse(status_code=413, content={"error": "Request body too large", "status_code": 413})
+                await response(scope, receive, send)
+                return
+            try:
+                payload = orjson.dumps(msgpack.unpackb(body))
+            except (ValueError, TypeError, msgpack.UnpackException):
+                response = JSONResponse(status_code=400, content={"error": "Malformed MessagePack body", "status_code": 400})
+                await response(scope, receive, send)
+                return
+
+            # Rewrite headers in place: outer middlewares read the router's
+            # endpoint/route back from this same scope
+            scope["headers"] = [
+                (name, value) for name, value in scope["headers"]
+                if name not in (b"content-type", b"content-length")
+            ] + [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())]
+            messages = iter([{"type": "http.request", "body": payload, "more_body": False}])
+            upstream_receive = receive
+
+            async def receive() -> Message:
+                message = next(messages, None)
+                return message if message is not None else await upstream_receive()
+
+        async def send_with_vary(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                if headers.get("content-type", "").startswith(("application/json", "application/msgpack")):
+                    # Security: Shared caches must not serve one format to the other
+                    headers.add_vary_header("Accept")
+            await send(message)
+
+        token = wire_format.set("msgpack" if wants_msgpack(accept) else "json")
+        try:
+            await self.app(scope, receive, send_with_vary)
+        finally:
+            wire_format.reset(token)
 
 
 def setup_middleware(app):
@@ -103,7 +489,7 @@ def setup_middleware(app):
         allow_credentials=settings.CORS_CREDENTIALS,
         allow_methods=settings.CORS_METHODS,
         allow_headers=settings.CORS_HEADERS,
-        expose_headers=["X-Process-Time"],
+        expose_headers=["X-Process-Time", "X-Next-Cursor", "X-DB-Queries", "X-DB-Time", "X-Profile-Id"],
     )
     
     # Security: Trusted host middleware
@@ -113,15 +499,33 @@ def setup_middleware(app):
             allowed_hosts=["*"]  # Configure with specific hosts in production
         )
     
+    # Performance: MessagePack wire format (inside compression, so it is compressed too)
+    if settings.MSGPACK_ENABLED and msgpack is not None:
+        app.add_middleware(MessagePackMiddleware, max_body_bytes=settings.MSGPACK_MAX_BODY_BYTES)
+    
+    # Performance: Negotiated response compression
+    if settings.COMPRESSION_ENABLED:
+        app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+    
     # Security: Security headers middleware
     app.add_middleware(SecurityHeadersMiddleware)
     
     # Security: Request logging middleware
     app.add_middleware(RequestLoggingMiddleware)
     
-    # Security: Rate limiting
+    # Performance: Opt-in request profiling (admin token or sampling)
+    if settings.PROFILE_TOKEN or settings.PROFILE_SAMPLE_RATE > 0:
+        app.add_middleware(ProfilerMiddleware)
+    
+    # Performance: Per-request SQL counts and N+1 detection
+    app.add_middleware(QueryStatsMiddleware)
+    
+    # Performance: Request metrics (outermost, so it times the whole stack)
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+    
+    # Security: Rate limiting (shared limiter; exceeded limits raise 429)
     app.state.limiter = limiter
-    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
     
     return app
 
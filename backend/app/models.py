@@ -2,7 +2,7 @@
 Database models using SQLAlchemy ORM
 Security: Type validation, constraints, relationships
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -74,6 +74,122 @@ class GroupMember(Base):
     user = relationship("User", back_populates="group_memberships")
     password = relationship("Password", back_populates="group_members")
 
+    __table_args__ = (
+        # Performance: Covering index for the shared-with-me feed
+        # (InnoDB appends the primary key, so group_name is covered too)
+        Index("ix_group_members_user_admin_password", "user_id", "admin_status", "password_id"),
+    )
+
+
+class GroupClosure(Base):
+    """Closure table for nested groups (one row per ancestor/descendant pair)"""
+    __tablename__ = "group_closure"
+    
+    closure_id = Column(Integer, primary_key=True, autoincrement=True)
+    ancestor = Column(String(500), nullable=False)
+    descendant = Column(String(500), nullable=False)
+    # Number of nesting levels between ancestor and descendant (>= 1)
+    depth = Column(Integer, nullable=False)
+    
+    # Prefix lengths keep both composite keys under InnoDB's 3072-byte limit
+    __table_args__ = (
+        Index(
+            "ix_group_closure_ancestor", "ancestor", "descendant",
+            mysql_length={"ancestor": 255, "descendant": 255},
+        ),
+        Index(
+            "ix_group_closure_descendant", "descendant", "depth", "ancestor",
+            mysql_length={"descendant": 255, "ancestor": 255},
+        ),
+    )
+
+
+class GroupShare(Base):
+    """Password shared with a whole group (inherited by nested groups)"""
+    __tablename__ = "group_shares"
+    
+    group_name = Column(String(500), primary_key=True)
+    password_id = Column(Integer, ForeignKey("passwords.password_id", ondelete="CASCADE"), primary_key=True)
+    shared_by = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    
+    __table_args__ = (
+        Index("ix_group_shares_password", "password_id"),
+    )
+
+
+MESSAGE_PENDING = "pending"
+MESSAGE_ACCEPTED = "accepted"
+MESSAGE_REJECTED = "rejected"
+
+
+class Message(Base):
+    """Notification message (trusted user request or group invitation)"""
+    __tablename__ = "messages"
+    
+    message_id = Column(Integer, primary_key=True, autoincrement=True)
+    recipient_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    sender_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    message_type = Column(String(50), nullable=False)
+    group_name = Column(String(500), nullable=True)
+    # Security: pending -> accepted | rejected, never reopened
+    status = Column(String(20), nullable=False, default=MESSAGE_PENDING)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    # Set when accepted/rejected; drives retention of processed messages
+    processed_at = Column(DateTime, nullable=True)
+    
+    sender = relationship("User", foreign_keys=[sender_id])
+    
+    __table_args__ = (
+        # Performance: Inbox listing and pending count per recipient
+        Index("ix_messages_recipient_status_created", "recipient_id", "status", "created_at"),
+        # Performance: Retention sweeps of processed messages
+        Index("ix_messages_processed_at", "processed_at"),
+    )
+
+
+SECURITY_EVENT_LOGIN_FAILED = "login_failed"
+SECURITY_EVENT_AUTH_FAILED = "auth_failed"
+
+
+class SecurityEvent(Base):
+    """Security audit record (failed logins, rejected 401/403 requests)"""
+    __tablename__ = "security_events"
+    
+    event_id = Column(Integer, primary_key=True, autoincrement=True)
+    event_type = Column(String(50), nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    username = Column(String(255), nullable=True)
+    client_ip = Column(String(45), nullable=True)
+    method = Column(String(10), nullable=True)
+    path = Column(String(500), nullable=True)
+    status_code = Column(Integer, nullable=True)
+    
+    __table_args__ = (
+        # Performance: Time-range queries, optionally filtered by type
+        Index("ix_security_events_created", "created_at"),
+        Index("ix_security_events_type_created", "event_type", "created_at"),
+    )
+
+
+class BackgroundJob(Base):
+    """Status and progress of a background group operation"""
+    __tablename__ = "background_jobs"
+    
+    job_id = Column(String(32), primary_key=True)
+    kind = Column(String(50), nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    status = Column(String(20), nullable=False)
+    total = Column(Integer, nullable=False)
+    processed = Column(Integer, nullable=False, default=0)
+    error = Column(String(255), nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        # Performance: Pruning of finished jobs past retention
+        Index("ix_background_jobs_finished", "finished_at"),
+    )
+
 
 class FAQ(Base):
     """FAQ model"""
@@ -92,4 +208,7 @@ class Admin(Base):
     admin_username = Column(String(255), unique=True, index=True, nullable=False)
     # Security: Admin password with strong hashing
     pswd_admin = Column(String(255), nullable=False)
+    # Security: User account granted administrator access to the API (by id;
+    # admin and user names are separate namespaces and are never matched)
+    user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), unique=True, nullable=True)
 
@@ -0,0 +1,129 @@
+"""
+Per-worker notification hub for streaming endpoints
+Performance: Bounded per-connection queues; slow consumers resync instead of
+growing memory. Events arrive through the cross-worker event bus.
+"""
+import asyncio
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+from app.config import settings
+from app.bus import event_bus, TOPIC_CACHE, TOPIC_MESSAGE, TOPIC_MESSAGE_STATUS
+
+
+class Subscription:
+    """One streaming connection's bounded event queue"""
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        # Set when events were dropped; the consumer must resync from the DB
+        self.overflowed = False
+
+    def offer(self, event: Tuple[str, Dict[str, Any]]) -> bool:
+        """Enqueue without blocking the publisher; flag overflow when full"""
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            self.overflowed = True
+            # Free the backlog; the consumer will reload from the database
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            return False
+
+    def reset(self) -> None:
+        self.overflowed = False
+
+
+class NotificationHub:
+    """
+    Fan-out of user-targeted events to the connections of that user
+    Security: Events are only delivered to subscriptions of the target user
+    """
+
+    def __init__(self, queue_size: int, max_connections_per_user: int):
+        self.queue_size = queue_size
+        self.max_connections_per_user = max_connections_per_user
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+
+    def can_subscribe(self, user_id: int) -> bool:
+        return len(self._subscribers.get(user_id, ())) < self.max_connections_per_user
+
+    def subscribe(self, user_id: int) -> Optional[Subscription]:
+        """Register a connection; None when the user has too many open"""
+        subscribers = self._subscribers.setdefault(user_id, set())
+        if len(subscribers) >= self.max_connections_per_user:
+            return None
+        subscription = Subscription(self.queue_size)
+        subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, user_id: int, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(user_id)
+        if not subscribers:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            self._subscribers.pop(user_id, None)
+
+    def publish(self, user_id: int, topic: str, payload: Dict[str, Any]) -> int:
+        """Deliver an event to every local connection of a user; returns deliveries"""
+        if topic == TOPIC_CACHE:
+            return 0
+        delivered = 0
+        for subscription in list(self._subscribers.get(user_id, ())):
+            if subscription.offer((topic, payload)):
+                delivered += 1
+        return delivered
+
+    def connection_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+notification_hub = NotificationHub(
+    queue_size=settings.SSE_QUEUE_SIZE,
+    max_connections_per_user=settings.SSE_MAX_CONNECTIONS_PER_USER,
+)
+
+class PendingCountWaiters:
+    """
+    Long-poll waiters woken when a user's pending message count may have changed
+    Performance: One shared asyncio.Event per waiting user; no DB access while waiting
+    """
+
+    def __init__(self):
+        self._events: Dict[int, asyncio.Event] = {}
+        self._waiting: Dict[int, int] = {}
+
+    @contextmanager
+    def watch(self, user_id: int) -> Iterator[asyncio.Event]:
+        """
+        Yield an event set on the user's next message change
+        Enter before reading the count, so a change in between is not missed
+        """
+        event = self._events.setdefault(user_id, asyncio.Event())
+        self._waiting[user_id] = self._waiting.get(user_id, 0) + 1
+        try:
+            yield event
+        finally:
+            remaining = self._waiting[user_id] - 1
+            if remaining:
+                self._waiting[user_id] = remaining
+            else:
+                self._waiting.pop(user_id, None)
+                if self._events.get(user_id) is event:
+                    self._events.pop(user_id, None)
+
+    def notify(self, user_id: int, topic: str, payload: Dict[str, Any]) -> None:
+        """Event bus handler: wake every waiter of the user on message changes"""
+        if topic not in (TOPIC_MESSAGE, TOPIC_MESSAGE_STATUS):
+            return
+        event = self._events.pop(user_id, None)
+        if event is not None:
+            event.set()
+
+
+pending_count_waiters = PendingCountWaiters()
+
+# Receive events published by any worker
+event_bus.subscribe(notification_hub.publish)
+event_bus.subscribe(pending_count_waiters.notify)
@@ -0,0 +1,194 @@
+"""
+Opt-in per-request profiling
+Performance: A request is profiled with cProfile when it carries the admin
+profile token (X-Profile-Token) or is picked by PROFILE_SAMPLE_RATE; the
+profile and its metadata are written to PROFILE_DIR
+Security: The token is compared in constant time; users are recorded as a
+keyed hash bucket, never by id or name
+
+cProfile hooks the whole worker thread, so while a request is profiled other
+requests interleaving on the event loop show up in the profile as well. Only
+one request is profiled at a time per worker.
+
+CLI (from backend/):
+    python -m app.profiling list [--route /api/security/analysis] [--limit 20]
+    python -m app.profiling show <profile_id> [--sort cumulative] [--limit 30]
+"""
+import cProfile
+import hashlib
+import hmac
+import json
+import os
+import random
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from app.config import settings
+from app.security import verify_token
+
+PROFILE_HEADER = b"x-profile-token"
+
+
+PROFILE_BY_TOKEN = "token"
+PROFILE_BY_SAMPLE = "sample"
+
+
+def profile_trigger(headers: List[tuple]) -> Optional[str]:
+    """Decide from the request headers whether to profile this request, and why"""
+    if settings.PROFILE_TOKEN:
+        for name, value in headers:
+            if name == PROFILE_HEADER:
+                # Security: Constant-time comparison of the admin token
+                if hmac.compare_digest(value, settings.PROFILE_TOKEN.encode()):
+                    return PROFILE_BY_TOKEN
+                return None
+    if settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE:
+        return PROFILE_BY_SAMPLE
+    return None
+
+
+def user_bucket(headers: List[tuple]) -> Optional[str]:
+    """
+    Pseudonymous bucket of the authenticated user, stable across requests
+    Security: Keyed with the JWT secret so bucket values cannot be reversed
+    """
+    for name, value in headers:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer":
+                return None
+            payload = verify_token(token)
+            if not payload or payload.get("user_id") is None:
+                return None
+            digest = hmac.new(
+                settings.JWT_SECRET_KEY.encode(),
+                str(payload["user_id"]).encode(),
+                hashlib.sha256,
+            ).hexdigest()
+            return digest[:8]
+    return None
+
+
+class ProfileStore:
+    """Directory of captured profiles: <id>.prof (pstats) and <id>.json (metadata)"""
+
+    def __init__(self, directory: str, max_files: int):
+        self.directory = directory
+        self.max_files = max_files
+
+    @staticmethod
+    def new_id() -> str:
+        """Profile id; sorts by capture time"""
+        return f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+    def save(self, profile_id: str, profiler: cProfile.Profile, meta: Dict[str, Any]) -> None:
+        """Write a finished profile; blocking, call from a thread"""
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        profiler.dump_stats(os.path.join(self.directory, f"{profile_id}.prof"))
+        with open(os.path.join(self.directory, f"{profile_id}.json"), "w") as f:
+            json.dump({"id": profile_id, **meta}, f)
+        self._prune()
+
+    def _prune(self) -> None:
+        ids = self._ids()
+        for profile_id in ids[:-self.max_files] if len(ids) > self.max_files else []:
+            for suffix in (".prof", ".json"):
+                try:
+                    os.unlink(os.path.join(self.directory, profile_id + suffix))
+                except FileNotFoundError:
+                    pass
+
+    def _ids(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.directory) if name.endswith(".json"))
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Metadata of all captured profiles, oldest first"""
+        entries = []
+        for profile_id in self._ids():
+            try:
+                with open(os.path.join(self.directory, f"{profile_id}.json")) as f:
+                    entries.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return entries
+
+    def render(self, profile_id: str, sort: str = "cumulative", limit: int = 30) -> str:
+        """pstats text report of one profile"""
+        import io
+        import pstats
+
+        # Security: Profile ids are file names; refuse path components
+        if os.path.basename(profile_id) != profile_id:
+            raise ValueError("Invalid profile id")
+        out = io.StringIO()
+        stats = pstats.Stats(os.path.join(self.directory, f"{profile_id}.prof"), stream=out)
+        stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+
+class RequestProfiler:
+    """Profiles at most one request at a time in this worker"""
+
+    def __init__(self, store: ProfileStore):
+        self.store = store
+        self._active = False
+
+    def start(self) -> Optional[cProfile.Profile]:
+        """Begin profiling, or None when another request is being profiled"""
+        if self._active:
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler (e.g. a debugger) is already active
+            return None
+        self._active = True
+        return profiler
+
+    def stop(self, profiler: cProfile.Profile) -> None:
+        profiler.disable()
+        self._active = False
+
+
+request_profiler = RequestProfiler(ProfileStore(settings.PROFILE_DIR, settings.PROFILE_MAX_FILES))
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="List and render captured request profiles")
+    parser.add_argument("--dir", default=settings.PROFILE_DIR, help="profile directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", help="list captured profiles")
+    list_parser.add_argument("--route", help="only profiles of this route template")
+    list_parser.add_argument("--limit", type=int, default=20)
+
+    show_parser = commands.add_parser("show", help="render one profile")
+    show_parser.add_argument("profile_id")
+    show_parser.add_argument("--sort", default="cumulative", help="pstats sort key (cumulative, tottime, calls)")
+    show_parser.add_argument("--limit", type=int, default=30)
+
+    args = parser.parse_args()
+    store = ProfileStore(args.dir, settings.PROFILE_MAX_FILES)
+
+    if args.command == "list":
+        entries = [e for e in store.list() if not args.route or e.get("route") == args.route]
+        print(f"{'id':<26} {'method':<7} {'route':<40} {'status':>6} {'ms':>9} {'user':<8}")
+        for entry in entries[-args.limit:]:
+            print(
+                f"{entry['id']:<26} {entry.get('method', ''):<7} {entry.get('route', ''):<40} "
+                f"{entry.get('status', ''):>6} {entry.get('duration_ms', 0):>9.1f} {entry.get('user_bucket') or '-':<8}"
+            )
+    else:
+        meta = next((e for e in store.list() if e["id"] == args.profile_id), {})
+        if meta:
+            print(json.dumps(meta, indent=2))
+        print(store.render(args.profile_id, sort=args.sort, limit=args.limit))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Per-request SQL instrumentation
+Performance: Counts queries and database time per request, logs slow queries
+and flags repeated identical statements in one request as suspected N+1 loops
+Security: Only statement text is logged, never bound parameter values
+"""
+import contextvars
+import logging
+import time
+from collections import Counter
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.config import settings
+
+logger = logging.getLogger("app.sql")
+
+# Longest statement text written to the log
+MAX_LOGGED_STATEMENT = 500
+
+
+class QueryStats:
+    """Queries issued while handling one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        # statement text (parameters are placeholders) -> executions
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.total_time += duration
+        self.shapes[statement] += 1
+
+    def repeated_shapes(self, threshold: int):
+        """Statements executed at least threshold times, most frequent first"""
+        return [(statement, count) for statement, count in self.shapes.most_common() if count >= threshold]
+
+
+_current_stats: contextvars.ContextVar[Optional[QueryStats]] = contextvars.ContextVar(
+    "query_stats", default=None
+)
+
+
+def begin_request() -> contextvars.Token:
+    """Start collecting stats for the current request (context)"""
+    return _current_stats.set(QueryStats())
+
+
+def end_request(token: contextvars.Token) -> None:
+    _current_stats.reset(token)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+def report_n_plus_one(stats: QueryStats, method: str, path: str) -> None:
+    """Log statements repeated often enough in one request to suggest a query loop"""
+    for statement, count in stats.repeated_shapes(settings.SQL_N_PLUS_ONE_THRESHOLD):
+        logger.warning(
+            "Suspected N+1 query pattern",
+            extra={"event": {
+                "event": "sql_n_plus_one",
+                "method": method,
+                "path": path,
+                "executions": count,
+                "statement": statement[:MAX_LOGGED_STATEMENT],
+            }},
+        )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start"].pop()
+
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+
+    if duration * 1000 >= settings.SQL_SLOW_QUERY_MS:
+        logger.warning(
+            "Slow query",
+            extra={"event": {
+                "event": "sql_slow_query",
+                "duration_ms": round(duration * 1000, 2),
+                "statement": statement[:MAX_LOGGED_STATEMENT],
+            }},
+        )
+
+
+def _handle_error(exception_context):
+    # Keep the timing stack balanced when a statement fails
+    starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach timing listeners to a (sync) engine"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
@@ -0,0 +1,263 @@
+"""
+Shared rate limiter
+Security: One limiter service for every router; clients are keyed on the
+authenticated user when available (so users behind one mobile NAT address do
+not share a budget) and on the client address otherwise
+Performance: GCRA (generic cell rate algorithm) keeps one timestamp per key,
+so each check is O(1) with no per-request lists or windows
+
+Backends (RATE_LIMIT_BACKEND):
+- memory: per worker; keys spread over sharded dicts, expired keys are swept
+          one shard at a time so memory stays bounded without long pauses
+- shared: all workers on the host; a fixed-size hash table in a memory-mapped
+          file, guarded by per-stripe fcntl record locks. Falls back to
+          memory where fcntl is unavailable (Windows)
+Other stores (for example one backed by Redis) are selected by setting
+RATE_LIMIT_BACKEND to "package.module:factory".
+"""
+import functools
+import hashlib
+import importlib
+import inspect
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import time
+from typing import Any, Callable, Dict, List, Tuple
+from fastapi import HTTPException, Request, status
+from app.config import runtime_path, settings
+from app.models import User
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_UNITS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+_LIMIT_RE = re.compile(r"^\s*(\d+)\s*(?:/|per)\s*(\d+)?\s*(second|minute|hour|day)s?\s*$")
+
+
+def parse_limit(limit: str) -> Tuple[int, float]:
+    """Parse "20/minute", "100 per hour" or "5/10 seconds" into (count, period seconds)"""
+    match = _LIMIT_RE.match(limit.lower())
+    if not match:
+        raise ValueError(f"Invalid rate limit: {limit}")
+    count, multiplier, unit = match.groups()
+    return int(count), _UNITS[unit] * int(multiplier or 1)
+
+
+def get_remote_address(request: Request) -> str:
+    """Client address of the request (127.0.0.1 when unknown)"""
+    if request.client is None or not request.client.host:
+        return "127.0.0.1"
+    return request.client.host
+
+
+class MemoryGCRAStore:
+    """
+    Per-worker GCRA state in sharded dicts
+    Performance: Every SWEEP_EVERY checks, one shard drops keys whose
+    theoretical arrival time has passed (their state equals a fresh key)
+    """
+    SWEEP_EVERY = 1024
+
+    def __init__(self, shards: int):
+        self._shards: List[Dict[str, float]] = [{} for _ in range(shards)]
+        self._ops = 0
+        self._next_sweep = 0
+
+    def hit(self, key: str, emission_interval: float, period: float) -> float:
+        """Consume one request; returns 0 if allowed, else seconds until allowed"""
+        now = time.monotonic()
+        shard = self._shards[hash(key) % len(self._shards)]
+        tat = max(shard.get(key, now), now)
+        new_tat = tat + emission_interval
+        retry_after = new_tat - period - now
+        if retry_after > 0:
+            return retry_after
+        shard[key] = new_tat
+
+        self._ops += 1
+        if self._ops >= self.SWEEP_EVERY:
+            self._ops = 0
+            self._sweep(now)
+        return 0.0
+
+    def _sweep(self, now: float) -> None:
+        shard = self._shards[self._next_sweep]
+        self._next_sweep = (self._next_sweep + 1) % len(self._shards)
+        for key in [key for key, tat in shard.items() if tat <= now]:
+            del shard[key]
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+
+class SharedGCRAStore:
+    """
+    Host-wide GCRA state shared by all workers
+    Layout: `slots` (hash: u64, tat: f64) pairs in a memory-mapped file. Keys
+    are located by open addressing over PROBES slots; expired slots are reused
+    and, when all probed slots are live, the one expiring first is evicted.
+    Each run of STRIPE slots is guarded by an fcntl record lock, so workers
+    only contend on the same stripe.
+    """
+    PROBES = 8
+    STRIPE = 64
+    _SLOT = struct.Struct("<Qd")
+
+    def __init__(self, path: str, slots: int):
+        self.slots = slots
+        self._fd = os.open(path, os.O_CREAT | os.O_RDWR, 0o600)
+        size = slots * self._SLOT.size
+        # Security: The first worker sizes the file under an exclusive lock
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size < size:
+                os.ftruncate(self._fd, size)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        # Stable across processes (unlike hash()); 0 marks an empty slot
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+
+    def hit(self, key: str, emission_interval: float, period: float) -> float:
+        """Consume one request; returns 0 if allowed, else seconds until allowed"""
+        key_hash = self._hash(key)
+        start = key_hash % self.slots
+        # Probed slots may span two stripes; lock the covering byte range
+        first_stripe = start // self.STRIPE
+        last_stripe = ((start + self.PROBES - 1) % self.slots) // self.STRIPE
+        stripes = {first_stripe, last_stripe}
+        for stripe in sorted(stripes):
+            self._lock(stripe, fcntl.LOCK_EX)
+        try:
+            return self._hit_locked(key_hash, start, emission_interval, period)
+        finally:
+            for stripe in stripes:
+                self._lock(stripe, fcntl.LOCK_UN)
+
+    def _lock(self, stripe: int, op: int) -> None:
+        length = self.STRIPE * self._SLOT.size
+        fcntl.lockf(self._fd, op, length, stripe * length)
+
+    def _hit_locked(self, key_hash: int, start: int, emission_interval: float, period: float) -> float:
+        # Wall clock: state outlives processes, and the file may outlive a reboot
+        now = time.time()
+        tat = now
+        target = start
+        target_expiry = math.inf
+        for probe in range(self.PROBES):
+            index = (start + probe) % self.slots
+            slot_hash, slot_tat = self._SLOT.unpack_from(self._map, index * self._SLOT.size)
+            if slot_hash == key_hash:
+                target, tat = index, max(slot_tat, now)
+                break
+            # Slot for a new key: a free or expired one, else the one expiring first
+            expiry = -math.inf if slot_hash == 0 or slot_tat <= now else slot_tat
+            if expiry < target_expiry:
+                target, target_expiry = index, expiry
+
+        new_tat = tat + emission_interval
+        retry_after = new_tat - period - now
+        if retry_after > 0:
+            return retry_after
+        self._SLOT.pack_into(self._map, target * self._SLOT.size, key_hash, new_tat)
+        return 0.0
+
+
+class RateLimiter:
+    """
+    Decorator-based limiter shared by all routers
+    Usage: @limiter.limit(settings.RATE_LIMIT_GENERAL) on an endpoint that
+    takes a `request: Request` parameter
+    """
+
+    def __init__(self, store: Any, enabled: bool = True):
+        self.store = store
+        self.enabled = enabled
+
+    def key_for(self, request: Request, kwargs: Dict[str, Any]) -> str:
+        """Authenticated user id when the endpoint resolved one, else client address"""
+        for value in kwargs.values():
+            if isinstance(value, User):
+                return f"user:{value.user_id}"
+        return f"ip:{get_remote_address(request)}"
+
+    def check(self, scope: str, key: str, limit: str) -> None:
+        """Raise 429 when key has exhausted limit in scope"""
+        count, period = parse_limit(limit)
+        self._check(scope, key, limit, period / count, period)
+
+    def _check(self, scope: str, key: str, limit: str, emission_interval: float, period: float) -> None:
+        retry_after = self.store.hit(f"{scope}|{key}", emission_interval, period)
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Rate limit exceeded: {limit}",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    def limit(self, limit: str) -> Callable:
+        """Limit an endpoint to `limit` requests per key"""
+        # Parsed once; malformed limits fail at import time
+        count, period = parse_limit(limit)
+        emission_interval = period / count
+
+        def decorator(func: Callable) -> Callable:
+            if "request" not in inspect.signature(func).parameters:
+                raise TypeError(f"Rate-limited endpoint {func.__name__} needs a 'request: Request' parameter")
+            scope = f"{func.__module__}.{func.__name__}"
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                if self.enabled:
+                    key = self.key_for(kwargs["request"], kwargs)
+                    self._check(scope, key, limit, emission_interval, period)
+                return await func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+
+def _shared_store() -> Any:
+    if fcntl is None:
+        logger.warning("Shared rate limit store unavailable on this platform; using memory")
+        return MemoryGCRAStore(settings.RATE_LIMIT_SHARDS)
+    return SharedGCRAStore(
+        settings.RATE_LIMIT_SHARED_PATH or runtime_path("ratelimit"),
+        settings.RATE_LIMIT_SHARED_SLOTS,
+    )
+
+
+_BACKENDS: Dict[str, Callable[[], Any]] = {
+    "memory": lambda: MemoryGCRAStore(settings.RATE_LIMIT_SHARDS),
+    "shared": _shared_store,
+}
+
+
+def create_store(backend: str) -> Any:
+    """
+    Build a store from a built-in name or a "package.module:factory" path
+    Stores implement hit(key, emission_interval, period) -> retry_after seconds
+    """
+    factory = _BACKENDS.get(backend)
+    if factory is None:
+        module_name, _, attr = backend.partition(":")
+        if not attr:
+            raise ValueError(f"Unknown rate limit backend: {backend}")
+        factory = getattr(importlib.import_module(module_name), attr)
+    return factory()
+
+
+# Security: The one limiter used by every router
+limiter = RateLimiter(create_store(settings.RATE_LIMIT_BACKEND), enabled=settings.RATE_LIMIT_ENABLED)
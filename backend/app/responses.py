@@ -0,0 +1,99 @@
+"""
+Fast response path and wire format negotiation
+Performance: orjson renders every response; list endpoints that return
+trusted ORM rows skip pydantic validation, response_model re-validation and
+jsonable_encoder, and are serialized exactly once
+Performance: Clients that send `Accept: application/msgpack` get MessagePack
+bodies from the same handlers (see MessagePackMiddleware); JSON otherwise
+"""
+from contextvars import ContextVar
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Type
+from uuid import UUID
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+try:
+    import msgpack
+except ImportError:  # Optional dependency; responses stay JSON without it
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+# Set per request by MessagePackMiddleware: "json" or "msgpack"
+wire_format: ContextVar[str] = ContextVar("wire_format", default="json")
+
+
+class RowSerializer:
+    """
+    Build response dicts from ORM rows using a response schema's field names
+    Security: Only fields declared on the schema are emitted, so columns not
+    in the response model never leak; rows must come from our own database
+    (no validation is performed)
+    """
+
+    def __init__(self, schema: Type[BaseModel]):
+        self.schema = schema
+        self.fields = tuple(schema.model_fields)
+
+    def dump(self, row: Any) -> Dict[str, Any]:
+        return {field: getattr(row, field) for field in self.fields}
+
+    def dump_many(self, rows: Iterable[Any]) -> List[Dict[str, Any]]:
+        fields = self.fields
+        return [{field: getattr(row, field) for field in fields} for row in rows]
+
+
+def _msgpack_default(value: Any) -> Any:
+    # Same representations orjson uses, so both formats carry identical values
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__} to MessagePack")
+
+
+def packb(content: Any) -> bytes:
+    return msgpack.packb(content, default=_msgpack_default, use_bin_type=True)
+
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    """True when the Accept header ranks MessagePack above JSON"""
+    if not accept or "msgpack" not in accept:
+        return False
+    msgpack_quality = json_quality = 0.0
+    for part in accept.split(","):
+        media_type, _, params = part.strip().partition(";")
+        media_type = media_type.strip().lower()
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type in MSGPACK_MEDIA_TYPES:
+            msgpack_quality = max(msgpack_quality, quality)
+        elif media_type in ("application/json", "application/*", "*/*"):
+            json_quality = max(json_quality, quality)
+    return msgpack_quality > 0 and msgpack_quality >= json_quality
+
+
+class NegotiatedResponse(ORJSONResponse):
+    """orjson response that renders MessagePack when the request negotiated it"""
+
+    def render(self, content: Any) -> bytes:
+        if msgpack is not None and wire_format.get() == "msgpack":
+            self.media_type = MSGPACK_MEDIA_TYPES[0]
+            return packb(content)
+        return super().render(content)
+
+
+def fast_response(content: Any, status_code: int = 200) -> NegotiatedResponse:
+    """
+    Return pre-built content as-is; FastAPI skips response_model processing
+    for Response instances (response_model still documents the schema)
+    """
+    return NegotiatedResponse(content, status_code=status_code)
@@ -0,0 +1,122 @@
+"""
+Retention sweeper for processed messages
+Performance: Accepted/rejected messages expire after a TTL and are capped per
+user, deleted in small batches so the sweeper never holds long locks
+"""
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import select, delete, func
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models import Message, MESSAGE_ACCEPTED, MESSAGE_REJECTED
+
+logger = logging.getLogger(__name__)
+
+PROCESSED_STATUSES = (MESSAGE_ACCEPTED, MESSAGE_REJECTED)
+
+
+class MessageSweeper:
+    """Periodic background task applying the message retention policy"""
+
+    def __init__(self, interval_seconds: int, retention_days: int, history_per_user: int, batch_size: int):
+        self.interval_seconds = interval_seconds
+        self.retention_days = retention_days
+        self.history_per_user = history_per_user
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        # Spread sweeps of several workers over the interval
+        await asyncio.sleep(random.uniform(0, self.interval_seconds))
+        while True:
+            try:
+                expired, trimmed = await self.sweep()
+                if expired or trimmed:
+                    logger.info(f"Message sweep removed {expired} expired and {trimmed} over-cap messages")
+            except Exception as e:
+                logger.error(f"Message sweep failed: {e}", exc_info=True)
+            await asyncio.sleep(self.interval_seconds)
+
+    async def sweep(self) -> tuple[int, int]:
+        """Run one retention pass; returns (expired, trimmed) row counts"""
+        return await self.delete_expired(), await self.trim_history()
+
+    async def delete_expired(self) -> int:
+        """Delete processed messages older than the TTL in batches"""
+        cutoff = datetime.utcnow() - timedelta(days=self.retention_days)
+        removed = 0
+        while True:
+            async with AsyncSessionLocal() as session:
+                async with session.begin():
+                    result = await session.execute(
+                        select(Message.message_id)
+                        .where(Message.processed_at < cutoff)
+                        .limit(self.batch_size)
+                    )
+                    message_ids = list(result.scalars().all())
+                    if not message_ids:
+                        return removed
+                    await session.execute(
+                        delete(Message).where(Message.message_id.in_(message_ids))
+                    )
+            removed += len(message_ids)
+            await asyncio.sleep(0)
+
+    async def trim_history(self) -> int:
+        """Keep at most history_per_user processed messages per recipient"""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(Message.recipient_id)
+                .where(Message.status.in_(PROCESSED_STATUSES))
+                .group_by(Message.recipient_id)
+                .having(func.count() > self.history_per_user)
+            )
+            recipient_ids = list(result.scalars().all())
+
+        removed = 0
+        for recipient_id in recipient_ids:
+            async with AsyncSessionLocal() as session:
+                async with session.begin():
+                    boundary = await session.execute(
+                        select(Message.message_id)
+                        .where(
+                            Message.recipient_id == recipient_id,
+                            Message.status.in_(PROCESSED_STATUSES),
+                        )
+                        .order_by(Message.message_id.desc())
+                        .offset(self.history_per_user)
+                        .limit(1)
+                    )
+                    newest_dropped_id = boundary.scalar_one_or_none()
+                    if newest_dropped_id is None:
+                        continue
+                    deleted = await session.execute(
+                        delete(Message).where(
+                            Message.recipient_id == recipient_id,
+                            Message.status.in_(PROCESSED_STATUSES),
+                            Message.message_id <= newest_dropped_id,
+                        )
+                    )
+            removed += deleted.rowcount or 0
+            await asyncio.sleep(0)
+        return removed
+
+
+message_sweeper = MessageSweeper(
+    interval_seconds=settings.MESSAGE_SWEEP_INTERVAL_SECONDS,
+    retention_days=settings.MESSAGE_RETENTION_DAYS,
+    history_per_user=settings.MESSAGE_HISTORY_PER_USER,
+    batch_size=settings.MESSAGE_SWEEP_BATCH_SIZE,
+)
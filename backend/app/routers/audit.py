@@ -0,0 +1,111 @@
+"""
+Security audit log routes
+Security: System administrators only
+"""
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, or_, and_
+from typing import List, Optional, Dict, Any
+from datetime import datetime, timezone
+from app.database import get_db
+from app.models import User, SecurityEvent
+from app.schemas import SecurityEventResponse
+from app.dependencies import get_current_admin
+from app.pagination import encode_cursor, decode_cursor
+from app.audit import audit_sink
+from app.config import settings
+from app.rate_limit import limiter
+
+router = APIRouter(prefix="/api/audit", tags=["Audit"])
+
+
+def _naive_utc(value: datetime) -> datetime:
+    """Normalise a query timestamp to naive UTC, matching created_at"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@router.get("/security-events", response_model=List[SecurityEventResponse])
+@limiter.limit(settings.RATE_LIMIT_GENERAL)
+async def list_security_events(
+    request: Request,
+    response: Response,
+    since: datetime,
+    until: Optional[datetime] = None,
+    event_type: Optional[str] = Query(None, max_length=50),
+    username: Optional[str] = Query(None, max_length=255),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    List security events in a time range, newest first
+    Security: Administrator only; a start time is required so queries stay bounded
+    Performance: Served by the (event_type, created_at) and created_at indexes;
+    the next page cursor is returned in the X-Next-Cursor header
+    """
+    # Security: Mixed naive/aware inputs must not reach the comparison below
+    since = _naive_utc(since)
+    if until is not None:
+        until = _naive_utc(until)
+    if until is not None and until < since:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="until must not be before since"
+        )
+
+    query = select(SecurityEvent).where(SecurityEvent.created_at >= since)
+    if until is not None:
+        query = query.where(SecurityEvent.created_at < until)
+    if event_type:
+        query = query.where(SecurityEvent.event_type == event_type)
+    if username:
+        query = query.where(SecurityEvent.username == username)
+
+    after = decode_cursor(cursor, str, int)
+    if after is not None:
+        after_id = after[1]
+        try:
+            after_created = _naive_utc(datetime.fromisoformat(after[0]))
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        query = query.where(
+            or_(
+                SecurityEvent.created_at < after_created,
+                and_(
+                    SecurityEvent.created_at == after_created,
+                    SecurityEvent.event_id < after_id,
+                ),
+            )
+        )
+
+    result = await db.execute(
+        query.order_by(SecurityEvent.created_at.desc(), SecurityEvent.event_id.desc())
+        .limit(limit + 1)
+    )
+    events = list(result.scalars().all())
+
+    if len(events) > limit:
+        events = events[:limit]
+        last = events[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at.isoformat(), last.event_id)
+
+    return events
+
+
+@router.get("/stats", response_model=Dict[str, Any])
+@limiter.limit(settings.RATE_LIMIT_GENERAL)
+async def get_audit_stats(
+    request: Request,
+    current_user: User = Depends(get_current_admin)
+):
+    """
+    Audit sink counters for this worker (recorded, written, dropped, failed)
+    Security: Administrator only
+    """
+    return {**audit_sink.stats, "buffered": audit_sink.buffered}
@@ -6,10 +6,8 @@ from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 from app.database import get_db
-from app.models import User, Question
+from app.models import User, Question, SECURITY_EVENT_LOGIN_FAILED
 from app.schemas import (
     LoginRequest, SignupRequest, TokenResponse, SecurityQuestionResponse,
     ResetPasswordRequest, ForgotPasswordRequest
@@ -20,11 +18,37 @@ from app.security import (
 )
 from app.dependencies import security
 from app.config import settings
+from app.logging_config import security_logger
+from app.audit import audit_sink
+from app.rate_limit import limiter, get_remote_address
 from datetime import timedelta
 import json
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
-limiter = Limiter(key_func=get_remote_address)
+
+
+def _record_login_failure(request: Request, username: str) -> None:
+    """
+    Log and audit a failed login
+    Security: Recorded for unknown usernames too, so credential stuffing
+    against nonexistent accounts shows up in the audit log
+    """
+    security_logger.warning(
+        "Failed login attempt",
+        extra={"event": {
+            "event": "login_failed",
+            "username": username,
+            "client": get_remote_address(request),
+        }},
+    )
+    audit_sink.record(
+        SECURITY_EVENT_LOGIN_FAILED,
+        username=username,
+        client_ip=get_remote_address(request),
+        method=request.method,
+        path=request.url.path,
+        status_code=status.HTTP_401_UNAUTHORIZED,
+    )
 
 
 @router.post("/login", response_model=TokenResponse)
@@ -53,6 +77,7 @@ async def login(
     
     # Security: Generic error message to prevent username enumeration
     if user is None:
+        _record_login_failure(request, login_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password"
@@ -61,7 +86,7 @@ async def login(
     # Security: Verify password
     if not verify_password(login_data.password, user.pswd):
         # Security: Log failed login attempt
-        print(f"[SECURITY] Failed login attempt for username: {login_data.username}")
+        _record_login_failure(request, login_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password"
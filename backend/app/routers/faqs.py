@@ -5,16 +5,14 @@ Security: Public endpoint with rate limiting
 from fastapi import APIRouter, Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 from typing import List
 from app.database import get_db
 from app.models import FAQ
 from app.schemas import FAQResponse
 from app.config import settings
+from app.rate_limit import limiter
 
 router = APIRouter(prefix="/api/faqs", tags=["FAQs"])
-limiter = Limiter(key_func=get_remote_address)
 
 
 @router.get("", response_model=List[FAQResponse])
@@ -2,22 +2,38 @@
 Group management routes
 Security: Group operations with authorization checks
 """
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+import heapq
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_, func, delete
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from pydantic import BaseModel, Field
 from app.database import get_db
-from app.models import User, GroupMember, Password
-from app.schemas import GroupMemberResponse, GroupShareRequest
-from app.dependencies import get_current_user
+from app.models import User, GroupMember, Password, GroupShare
+from app.schemas import (
+    GroupMemberResponse, GroupShareRequest, SharedPasswordItem, SharedPasswordPage
+)
+from app.dependencies import get_current_user, ensure_group_admin, require_group_admin
+from app.cache import group_role_cache
 from app.security import sanitize_input
 from app.config import settings
+from app.pagination import encode_cursor, decode_cursor
+from app.jobs import job_runner, share_to_all_job, delete_group_job
+from app.bus import event_bus, TOPIC_GROUP
+from app.group_tree import (
+    nest_group, unnest_group, rename_in_tree, remove_from_tree, unshare_from_group,
+    effective_groups_query, password_viewers_query, inherited_shares_query
+)
+from app.rate_limit import limiter
+from app.responses import NegotiatedResponse
 
 router = APIRouter(prefix="/api/groups", tags=["Groups"])
-limiter = Limiter(key_func=get_remote_address)
+
+
+def _notify_members(user_ids: List[int], action: str, group_name: str, **extra: Any) -> None:
+    """Publish a group change to the affected users on every worker"""
+    for user_id in user_ids:
+        event_bus.publish(user_id, TOPIC_GROUP, {"action": action, "group_name": group_name, **extra})
 
 
 @router.get("", response_model=List[GroupMemberResponse])
@@ -55,58 +71,72 @@ async def get_groups(
     return groups_with_usernames
 
 
+# Page size of the member list when only a cursor is given
+MEMBER_PAGE_SIZE = 100
+
+
 @router.get("/{group_name}/members", response_model=List[GroupMemberResponse])
 @limiter.limit(settings.RATE_LIMIT_GENERAL)
 async def get_group_members(
     request: Request,
+    response: Response,
     group_name: str,
-    current_user: User = Depends(get_current_user),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    username_prefix: Optional[str] = Query(None, min_length=1, max_length=50),
+    admin_only: bool = False,
+    current_user: User = Depends(require_group_admin("Only group admins can view members")),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Get all members of a group
+    Get members of a group; paginated when limit or cursor is given
     Security: Authentication required, admin check
+    Performance: Keyset pagination over the (group_name, user_id) primary key;
+    the next page cursor is returned in the X-Next-Cursor header. Without
+    limit and cursor all members are returned, as before pagination
     """
-    # Security: Check if user is admin of the group
-    result = await db.execute(
-        select(GroupMember).where(
-            and_(
-                GroupMember.group_name == group_name,
-                GroupMember.user_id == current_user.user_id,
-                GroupMember.admin_status == True
-            )
-        )
+    query = (
+        select(GroupMember, User.username)
+        .join(User, User.user_id == GroupMember.user_id)
+        .where(GroupMember.group_name == group_name)
     )
-    admin_check = result.scalar_one_or_none()
     
-    if not admin_check:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only group admins can view members"
+    if username_prefix:
+        # Security: Escape LIKE wildcards in user input
+        prefix = (
+            username_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
         )
+        query = query.where(User.username.like(f"{prefix}%", escape="\\"))
     
-    # Security: Get all group members
-    result = await db.execute(
-        select(GroupMember).where(GroupMember.group_name == group_name)
-    )
-    members = result.scalars().all()
+    if admin_only:
+        query = query.where(GroupMember.admin_status == True)
     
-    members_with_usernames = []
-    for member in members:
-        user_result = await db.execute(
-            select(User.username).where(User.user_id == member.user_id)
-        )
-        username = user_result.scalar_one_or_none()
-        
-        members_with_usernames.append(GroupMemberResponse(
+    after = decode_cursor(cursor, int)
+    if after is not None:
+        query = query.where(GroupMember.user_id > after[0])
+    
+    query = query.order_by(GroupMember.user_id)
+    if limit is not None or cursor is not None:
+        limit = limit or MEMBER_PAGE_SIZE
+        query = query.limit(limit + 1)
+    
+    result = await db.execute(query)
+    rows = result.all()
+    
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1][0].user_id)
+    
+    return [
+        GroupMemberResponse(
             group_name=member.group_name,
             user_id=member.user_id,
             admin_status=member.admin_status,
             password_id=member.password_id,
             username=username
-        ))
-    
-    return members_with_usernames
+        )
+        for member, username in rows
+    ]
 
 
 @router.post("/share", status_code=status.HTTP_200_OK)
@@ -139,22 +169,9 @@ async def share_password(
         )
     
     # Security: Verify user is admin of the group
-    result = await db.execute(
-        select(GroupMember).where(
-            and_(
-                GroupMember.group_name == share_data.group_name,
-                GroupMember.user_id == current_user.user_id,
-                GroupMember.admin_status == True
-            )
-        )
+    await ensure_group_admin(
+        db, current_user, share_data.group_name, "Only group admins can share passwords"
     )
-    admin_check = result.scalar_one_or_none()
-    
-    if not admin_check:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only group admins can share passwords"
-        )
     
     # Security: Share password with specified users
     for user_id in share_data.user_ids:
@@ -183,6 +200,12 @@ async def share_password(
             db.add(new_member)
     
     await db.commit()
+    for user_id in share_data.user_ids:
+        group_role_cache.invalidate_user(user_id)
+    _notify_members(
+        share_data.user_ids, "password_shared", share_data.group_name,
+        password_id=share_data.password_id
+    )
     
     return {"success": True, "message": "Password shared successfully"}
 
@@ -200,22 +223,9 @@ async def unshare_password(
     Security: Authentication required, admin check
     """
     # Security: Verify user is admin of the group
-    result = await db.execute(
-        select(GroupMember).where(
-            and_(
-                GroupMember.group_name == share_data.group_name,
-                GroupMember.user_id == current_user.user_id,
-                GroupMember.admin_status == True
-            )
-        )
+    await ensure_group_admin(
+        db, current_user, share_data.group_name, "Only group admins can unshare passwords"
     )
-    admin_check = result.scalar_one_or_none()
-    
-    if not admin_check:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only group admins can unshare passwords"
-        )
     
     # Security: Remove password sharing for specified users
     for user_id in share_data.user_ids:
@@ -233,11 +243,109 @@ async def unshare_password(
         if member:
             member.password_id = None
     
+    # Security: Also revoke a whole-group share, which nested groups inherit
+    inherited_ids = await unshare_from_group(db, share_data.group_name, share_data.password_id)
+    
     await db.commit()
+    notified = set(share_data.user_ids)
+    _notify_members(
+        share_data.user_ids + [user_id for user_id in inherited_ids if user_id not in notified],
+        "password_unshared", share_data.group_name,
+        password_id=share_data.password_id
+    )
     
     return {"success": True, "message": "Password unshared successfully"}
 
 
+def _with_password_metadata(query, password_id_col, group_name_col, user_id: int, after: Optional[List[Any]]):
+    """
+    Add password and owner columns to a (password_id, group_name) share query,
+    ordered and keyset-filtered on the given base-table columns
+    """
+    query = (
+        query.with_only_columns(
+            password_id_col.label("password_id"),
+            Password.application_name,
+            Password.account_user_name,
+            group_name_col.label("group_name"),
+            User.user_id.label("owner_id"),
+            User.username.label("owner_username"),
+        )
+        .join(Password, Password.password_id == password_id_col)
+        .join(User, User.user_id == Password.user_id)
+        .where(Password.user_id != user_id)
+        .order_by(password_id_col, group_name_col)
+    )
+    
+    if after is not None:
+        last_password_id, last_group_name = after
+        query = query.where(
+            or_(
+                password_id_col > last_password_id,
+                and_(
+                    password_id_col == last_password_id,
+                    group_name_col > last_group_name
+                )
+            )
+        )
+    
+    return query
+
+
+def _shared_passwords_queries(user_id: int, after: Optional[List[Any]] = None):
+    """
+    Queries for passwords shared with a user, with group and owner metadata:
+    direct shares, and shares inherited through nesting
+    Security: Only non-admin memberships of the given user are returned, plus
+    passwords shared as a whole with groups the user inherits through nesting
+    Performance: Each query orders by base-table columns, so its keyset scan
+    follows an index (ix_group_members_user_admin_password and
+    ix_group_shares_password) instead of sorting a derived table
+    """
+    direct = select(GroupMember.password_id).select_from(GroupMember).where(
+        and_(
+            GroupMember.user_id == user_id,
+            GroupMember.admin_status == False,
+            GroupMember.password_id.isnot(None)
+        )
+    )
+    return (
+        _with_password_metadata(direct, GroupMember.password_id, GroupMember.group_name, user_id, after),
+        _with_password_metadata(
+            # A user in several groups nested under the sharing group
+            # reaches the share once per group
+            inherited_shares_query(user_id).distinct(),
+            GroupShare.password_id, GroupShare.group_name, user_id, after
+        ),
+    )
+
+
+async def _fetch_shared_passwords(
+    db: AsyncSession, user_id: int, after: Optional[List[Any]] = None, limit: Optional[int] = None
+) -> list:
+    """
+    Run both share queries and merge them in (password_id, group_name) order
+    A password reachable both ways for the same group is returned once
+    """
+    results = []
+    for query in _shared_passwords_queries(user_id, after):
+        if limit is not None:
+            query = query.limit(limit)
+        results.append((await db.execute(query)).all())
+    
+    rows = []
+    seen = set()
+    for row in heapq.merge(*results, key=lambda row: (row.password_id, row.group_name)):
+        key = (row.password_id, row.group_name)
+        if key in seen:
+            continue
+        seen.add(key)
+        rows.append(row)
+        if limit is not None and len(rows) == limit:
+            break
+    return rows
+
+
 @router.get("/shared/passwords", response_model=List[dict])
 @limiter.limit(settings.RATE_LIMIT_PASSWORD)
 async def get_shared_passwords(
@@ -249,52 +357,39 @@ async def get_shared_passwords(
     Get passwords shared with current user by group admins
     Security: Authentication required, non-admin check
     """
-    # Security: Query shared passwords for non-admin users
-    result = await db.execute(
-        select(Password, GroupMember)
-        .join(GroupMember, Password.password_id == GroupMember.password_id)
-        .join(
-            GroupMember,
-            and_(
-                GroupMember.group_name == GroupMember.group_name,
-                GroupMember.admin_status == True,
-                GroupMember.password_id.isnot(None)
-            ),
-            isouter=True
-        )
-        .where(
-            and_(
-                GroupMember.user_id == current_user.user_id,
-                GroupMember.admin_status == False,
-                GroupMember.password_id.isnot(None)
-            )
-        )
-    )
+    rows = await _fetch_shared_passwords(db, current_user.user_id)
     
-    # Security: Simplified query for shared passwords
-    result = await db.execute(
-        select(Password, GroupMember.group_name)
-        .join(GroupMember, Password.password_id == GroupMember.password_id)
-        .where(
-            and_(
-                GroupMember.user_id == current_user.user_id,
-                GroupMember.admin_status == False,
-                GroupMember.password_id.isnot(None)
-            )
-        )
+    return [dict(row._mapping) for row in rows]
+
+
+@router.get("/shared/passwords/feed", response_model=SharedPasswordPage)
+@limiter.limit(settings.RATE_LIMIT_PASSWORD)
+async def get_shared_passwords_feed(
+    request: Request,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Cursor-paginated feed of passwords shared with current user
+    Security: Authentication required, non-admin check
+    Performance: Keyset pagination; direct and inherited shares are read
+    with separate index-ordered queries (limit + 1 rows each) and merged
+    """
+    rows = await _fetch_shared_passwords(
+        db, current_user.user_id, decode_cursor(cursor, int, str), limit + 1
     )
     
-    shared = result.all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].password_id, rows[-1].group_name)
     
-    return [
-        {
-            "password_id": p.password_id,
-            "application_name": p.application_name,
-            "account_user_name": p.account_user_name,
-            "group_name": group_name
-        }
-        for p, group_name in shared
-    ]
+    return SharedPasswordPage(
+        items=[SharedPasswordItem(**row._mapping) for row in rows],
+        next_cursor=next_cursor
+    )
 
 
 # ========================
@@ -331,6 +426,7 @@ async def create_group(
     if membership:
         membership.admin_status = True
         await db.commit()
+        group_role_cache.invalidate_user(current_user.user_id)
         return {"success": True, "message": "Group already exists; you are admin"}
 
     new_group = GroupMember(
@@ -341,6 +437,7 @@ async def create_group(
     )
     db.add(new_group)
     await db.commit()
+    group_role_cache.invalidate_user(current_user.user_id)
     return {"success": True, "message": "Group created"}
 
 
@@ -384,23 +481,12 @@ async def remove_member(
     request: Request,
     group_name: str,
     user_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_group_admin("Only admins can remove members")),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Remove a user from a group. Only admins may remove members.
     """
-    admin_check = await db.execute(
-        select(GroupMember).where(
-            GroupMember.group_name == group_name,
-            GroupMember.user_id == current_user.user_id,
-            GroupMember.admin_status == True,
-        )
-    )
-    admin_entry = admin_check.scalar_one_or_none()
-    if not admin_entry:
-        raise HTTPException(status_code=403, detail="Only admins can remove members")
-
     if user_id == current_user.user_id:
         admin_count_res = await db.execute(
             select(func.count()).select_from(GroupMember).where(
@@ -419,9 +505,34 @@ async def remove_member(
         )
     )
     await db.commit()
+    group_role_cache.invalidate_user(user_id)
+    _notify_members([user_id], "member_removed", group_name)
     return {"success": True, "message": "Member removed"}
 
 
+async def _count_members(db: AsyncSession, group_name: str) -> int:
+    """Count memberships of a group"""
+    result = await db.execute(
+        select(func.count()).select_from(GroupMember).where(
+            GroupMember.group_name == group_name
+        )
+    )
+    return int(result.scalar_one() or 0)
+
+
+def _job_accepted(job_id: str, message: str) -> NegotiatedResponse:
+    """202 response pointing at the job-status endpoint"""
+    return NegotiatedResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            "success": True,
+            "message": message,
+            "job_id": job_id,
+            "status_url": f"/api/jobs/{job_id}",
+        },
+    )
+
+
 class ShareAllBody(BaseModel):
     group_name: str
     password_id: int
@@ -437,6 +548,10 @@ async def share_password_to_all(
 ):
     """
     Share a password with all members of a group.
+    The share is also recorded for the group as a whole, so members of
+    nested groups inherit it.
+    Groups above GROUP_BACKGROUND_THRESHOLD members are updated by a
+    background job; the response is then 202 with the job id.
     """
     password_check = await db.execute(
         select(Password).where(
@@ -448,16 +563,26 @@ async def share_password_to_all(
     if not password:
         raise HTTPException(status_code=404, detail="Password not found or access denied")
 
-    admin_check = await db.execute(
-        select(GroupMember).where(
-            GroupMember.group_name == body.group_name,
-            GroupMember.user_id == current_user.user_id,
-            GroupMember.admin_status == True,
+    await ensure_group_admin(db, current_user, body.group_name, "Only admins can share passwords")
+
+    await db.merge(
+        GroupShare(
+            group_name=body.group_name,
+            password_id=body.password_id,
+            shared_by=current_user.user_id,
         )
     )
-    admin_entry = admin_check.scalar_one_or_none()
-    if not admin_entry:
-        raise HTTPException(status_code=403, detail="Only admins can share passwords")
+
+    member_count = await _count_members(db, body.group_name)
+    if member_count > settings.GROUP_BACKGROUND_THRESHOLD:
+        await db.commit()
+        job = await job_runner.submit(
+            "share_all",
+            current_user.user_id,
+            member_count,
+            share_to_all_job(body.group_name, body.password_id),
+        )
+        return _job_accepted(job.job_id, "Sharing with all members in the background")
 
     members = await db.execute(
         select(GroupMember).where(GroupMember.group_name == body.group_name)
@@ -494,16 +619,7 @@ async def rename_group(
     if current_name == new_name:
         return {"success": True, "message": "Group name unchanged"}
 
-    admin_check = await db.execute(
-        select(GroupMember).where(
-            GroupMember.group_name == current_name,
-            GroupMember.user_id == current_user.user_id,
-            GroupMember.admin_status == True,
-        )
-    )
-    admin_entry = admin_check.scalar_one_or_none()
-    if not admin_entry:
-        raise HTTPException(status_code=403, detail="Only admins can rename groups")
+    await ensure_group_admin(db, current_user, current_name, "Only admins can rename groups")
 
     # Ensure group exists
     members_res = await db.execute(
@@ -522,8 +638,10 @@ async def rename_group(
 
     for member in members:
         member.group_name = new_name
+    await rename_in_tree(db, current_name, new_name)
 
     await db.commit()
+    group_role_cache.invalidate_group(current_name)
     return {"success": True, "message": "Group renamed", "new_name": new_name}
 
 
@@ -537,28 +655,133 @@ async def delete_group(
 ):
     """
     Delete a group entirely (remove all memberships). Admins only.
+    Groups above GROUP_BACKGROUND_THRESHOLD members are deleted by a
+    background job; the response is then 202 with the job id.
     """
     group_name = group_name.strip()
     if not group_name:
         raise HTTPException(status_code=400, detail="Group name required")
 
-    admin_check = await db.execute(
-        select(GroupMember).where(
-            GroupMember.group_name == group_name,
-            GroupMember.user_id == current_user.user_id,
-            GroupMember.admin_status == True,
-        )
-    )
-    admin_entry = admin_check.scalar_one_or_none()
-    if not admin_entry:
-        raise HTTPException(status_code=403, detail="Only admins can delete groups")
+    await ensure_group_admin(db, current_user, group_name, "Only admins can delete groups")
 
-    members_res = await db.execute(
-        select(GroupMember.user_id).where(GroupMember.group_name == group_name)
-    )
-    if not members_res.all():
+    member_count = await _count_members(db, group_name)
+    if not member_count:
         raise HTTPException(status_code=404, detail="Group not found")
 
+    if member_count > settings.GROUP_BACKGROUND_THRESHOLD:
+        # The job drops the nesting links and shares after the last member
+        job = await job_runner.submit(
+            "delete_group",
+            current_user.user_id,
+            member_count,
+            delete_group_job(group_name, lambda: group_role_cache.invalidate_group(group_name)),
+        )
+        return _job_accepted(job.job_id, "Deleting group in the background")
+
+    await remove_from_tree(db, group_name)
     await db.execute(delete(GroupMember).where(GroupMember.group_name == group_name))
     await db.commit()
-    return {"success": True, "message": "Group deleted"}
\ No newline at end of file
+    group_role_cache.invalidate_group(group_name)
+    return {"success": True, "message": "Group deleted"}
+
+
+# ========================
+# Nested groups
+# ========================
+
+class NestGroupBody(BaseModel):
+    child_group: str = Field(..., min_length=1, max_length=500)
+
+
+@router.post("/{group_name}/subgroups", status_code=status.HTTP_201_CREATED)
+@limiter.limit(settings.RATE_LIMIT_GENERAL)
+async def add_subgroup(
+    request: Request,
+    group_name: str,
+    body: NestGroupBody,
+    current_user: User = Depends(require_group_admin("Only admins can nest groups")),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Nest a group inside another group. Members of the nested group inherit
+    membership of the parent group and all of its ancestors.
+    Admin of both groups required.
+    """
+    child_group = body.child_group.strip()
+    await ensure_group_admin(db, current_user, child_group, "Only admins can nest groups")
+
+    await nest_group(db, group_name, child_group)
+    await db.commit()
+    return {"success": True, "message": "Group nested"}
+
+
+@router.delete("/{group_name}/subgroups/{child_group}", status_code=status.HTTP_200_OK)
+@limiter.limit(settings.RATE_LIMIT_GENERAL)
+async def remove_subgroup(
+    request: Request,
+    group_name: str,
+    child_group: str,
+    current_user: User = Depends(require_group_admin("Only admins can unnest groups")),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Detach a nested group from its parent. Admin of the parent required.
+    """
+    await unnest_group(db, group_name, child_group)
+    await db.commit()
+    return {"success": True, "message": "Group unnested"}
+
+
+@router.get("/effective", response_model=List[Dict[str, Any]])
+@limiter.limit(settings.RATE_LIMIT_GENERAL)
+async def get_effective_groups(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    List every group the current user belongs to, directly or through nesting.
+    """
+    groups = effective_groups_query(current_user.user_id).subquery()
+    result = await db.execute(
+        select(groups.c.group_name, func.min(groups.c.depth).label("depth"))
+        .group_by(groups.c.group_name)
+        .order_by(groups.c.group_name)
+    )
+    return [
+        {"group_name": group_name, "inherited": depth > 0}
+        for group_name, depth in result.all()
+    ]
+
+
+@router.get("/passwords/{password_id}/viewers", response_model=List[Dict[str, Any]])
+@limiter.limit(settings.RATE_LIMIT_PASSWORD)
+async def get_password_viewers(
+    request: Request,
+    password_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    List every user that can see a password through groups, including
+    members of nested groups. Only the password owner may ask.
+    """
+    password_check = await db.execute(
+        select(Password.password_id).where(
+            Password.password_id == password_id,
+            Password.user_id == current_user.user_id,
+        )
+    )
+    if password_check.first() is None:
+        raise HTTPException(status_code=404, detail="Password not found or access denied")
+
+    viewers = password_viewers_query(password_id).subquery()
+    result = await db.execute(
+        select(User.user_id, User.username)
+        .join(viewers, viewers.c.user_id == User.user_id)
+        .order_by(User.username)
+    )
+    return [
+        {"user_id": user_id, "username": username}
+        for user_id, username in result.all()
+    ]
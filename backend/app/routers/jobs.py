@@ -0,0 +1,39 @@
+"""
+Background job status routes
+Security: Users can only see jobs they started
+"""
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Any
+from app.database import get_db
+from app.models import User
+from app.dependencies import get_current_user
+from app.jobs import job_runner
+from app.config import settings
+from app.rate_limit import limiter
+
+router = APIRouter(prefix="/api/jobs", tags=["Jobs"])
+
+
+@router.get("/{job_id}", response_model=Dict[str, Any])
+@limiter.limit(settings.RATE_LIMIT_GENERAL)
+async def get_job_status(
+    request: Request,
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get status and progress of a background job
+    Security: Authentication required, owner isolation
+    Jobs are stored in the database, so any worker can answer
+    """
+    job = await job_runner.get(db, job_id, current_user.user_id)
+    
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    return job.to_dict()
@@ -2,25 +2,75 @@
 Messages/Notifications routes
 Security: Message management for trusted user requests and group invitations
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, status, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-from typing import List, Dict, Any
+from sqlalchemy import select, insert, and_, or_, func, text
+from typing import List, Dict, Any, AsyncIterator, Optional
 from datetime import datetime
-from app.database import get_db
-from app.models import User
-from app.dependencies import get_current_user
+import asyncio
+import json
+import time
+from app.database import get_db, admitted_session, AsyncSessionLocal
+from app.models import User, Message, GroupMember, MESSAGE_PENDING, MESSAGE_ACCEPTED, MESSAGE_REJECTED
+from app.dependencies import get_current_user, ensure_group_admin
+from app.cache import group_role_cache
 from app.config import settings
+from app.notifications import notification_hub, pending_count_waiters
+from app.bus import event_bus, TOPIC_MESSAGE, TOPIC_MESSAGE_STATUS
+from app.rate_limit import limiter
 
 router = APIRouter(prefix="/api/messages", tags=["Messages"])
-limiter = Limiter(key_func=get_remote_address)
 
-# Security: In-memory message storage (in production, use database)
-# This is a simplified implementation - in production, create a messages table
-messages_store: Dict[int, List[Dict[str, Any]]] = {}
+MESSAGE_TRUSTED_USER_REQUEST = "trusted_user_request"
+MESSAGE_GROUP_INVITATION = "group_invitation"
+
+MESSAGE_TEXT = {
+    MESSAGE_TRUSTED_USER_REQUEST: "wants to add you as a trusted user",
+    MESSAGE_GROUP_INVITATION: "invited you to join the group",
+}
+
+
+def message_to_dict(message: Message, sender_username: str) -> Dict[str, Any]:
+    """Serialize a message row in the shape the mobile app expects"""
+    data = {
+        "id": message.message_id,
+        "type": message.message_type,
+        "from": sender_username,
+        "message": MESSAGE_TEXT.get(message.message_type, ""),
+        "timestamp": message.created_at.isoformat() if message.created_at else None,
+        "status": message.status,
+    }
+    if message.message_type == MESSAGE_TRUSTED_USER_REQUEST:
+        data["fromEmail"] = f"{sender_username}@example.com"
+    if message.group_name is not None:
+        data["groupName"] = message.group_name
+    return data
+
+
+async def get_pending_message(db: AsyncSession, message_id: int, user_id: int) -> Message:
+    """
+    Load and lock a pending message addressed to the user by primary key
+    Security: Messages addressed to other users are reported as not found.
+    The row stays locked (SELECT ... FOR UPDATE) until the caller commits, so
+    concurrent accepts or rejects of one message are processed once
+    """
+    message = await db.get(Message, message_id, with_for_update=True)
+    
+    if message is None or message.recipient_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Message not found"
+        )
+    
+    if message.status != MESSAGE_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Message already processed"
+        )
+    
+    return message
 
 
 class TrustedUserRequestBody(BaseModel):
@@ -31,6 +81,11 @@ class GroupInvitationBody(BaseModel):
     target_username: str
     group_name: str
 
+
+class BulkGroupInvitationBody(BaseModel):
+    target_usernames: List[str] = Field(..., min_items=1, max_items=settings.MAX_BULK_INVITATIONS)
+    group_name: str = Field(..., min_length=1, max_length=500)
+
 @router.get("", response_model=List[Dict[str, Any]])
 @limiter.limit(settings.RATE_LIMIT_GENERAL)
 async def get_messages(
@@ -42,13 +97,158 @@ async def get_messages(
     Get all messages for current user
     Security: Authentication required, user isolation
     """
-    # Security: Get messages for current user
-    user_messages = messages_store.get(current_user.user_id, [])
+    # Security: Get pending messages for current user only
+    result = await db.execute(
+        select(Message, User.username)
+        .join(User, User.user_id == Message.sender_id)
+        .where(
+            Message.recipient_id == current_user.user_id,
+            Message.status == MESSAGE_PENDING
+        )
+        .order_by(Message.created_at, Message.message_id)
+    )
     
-    # Security: Filter only pending messages
-    pending_messages = [msg for msg in user_messages if msg.get("status") == "pending"]
+    return [message_to_dict(message, username) for message, username in result.all()]
+
+
+def publish_status(message: Message) -> None:
+    """Tell every worker that a message left the pending state"""
+    event_bus.publish(
+        message.recipient_id,
+        TOPIC_MESSAGE_STATUS,
+        {"id": message.message_id, "status": message.status},
+    )
+
+
+async def count_pending(db: AsyncSession, user_id: int) -> int:
+    """Count pending messages for a user"""
+    # Performance: Index-only count over ix_messages_recipient_status_created
+    result = await db.execute(
+        select(func.count()).select_from(Message).where(
+            Message.recipient_id == user_id,
+            Message.status == MESSAGE_PENDING
+        )
+    )
+    return result.scalar_one()
+
+
+async def pending_messages_since(user_id: int, last_id: int) -> List[Dict[str, Any]]:
+    """
+    Load pending messages newer than an event id for stream replay
+    Uses a short-lived session so streams never pin a pool connection
+    """
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(Message, User.username)
+            .join(User, User.user_id == Message.sender_id)
+            .where(
+                Message.recipient_id == user_id,
+                Message.status == MESSAGE_PENDING,
+                Message.message_id > last_id
+            )
+            .order_by(Message.message_id)
+            .limit(settings.SSE_REPLAY_LIMIT)
+        )
+        return [message_to_dict(message, username) for message, username in result.all()]
+
+
+async def replay_pending(user_id: int, last_id: int) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield every pending message newer than an event id, in id order
+    Performance: Loaded SSE_REPLAY_LIMIT rows per query until exhausted, so
+    live events never move the stream past messages not yet replayed
+    """
+    while True:
+        batch = await pending_messages_since(user_id, last_id)
+        for event in batch:
+            last_id = event["id"]
+            yield event
+        if len(batch) < settings.SSE_REPLAY_LIMIT:
+            return
+
+
+def format_sse(payload: Dict[str, Any], topic: str = TOPIC_MESSAGE) -> str:
+    """
+    Encode an event as a Server-Sent Event
+    Only messages carry an id, since only they can be replayed from the database
+    """
+    data = json.dumps(payload, separators=(',', ':'))
+    if topic == TOPIC_MESSAGE:
+        return f"id: {payload['id']}\nevent: {topic}\ndata: {data}\n\n"
+    return f"event: {topic}\ndata: {data}\n\n"
+
+
+@router.get("/stream")
+@limiter.limit(settings.RATE_LIMIT_GENERAL)
+async def stream_messages(
+    request: Request,
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Server-Sent Events stream of new trusted user requests and group invitations,
+    plus group and vault change notifications from any worker
+    Security: Authentication required, user isolation
+    Performance: Heartbeats keep proxies open; Last-Event-ID resumes from the
+    database; a connection whose queue fills up resyncs instead of buffering
+    """
+    user_id = current_user.user_id
+    # Performance: Release the pool connection before the long-lived response
+    await db.close()
+    
+    if not notification_hub.can_subscribe(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many open message streams"
+        )
     
-    return pending_messages
+    async def event_stream() -> AsyncIterator[str]:
+        last_id = last_event_id
+        # Subscribe inside the generator so cleanup always pairs with it
+        subscription = notification_hub.subscribe(user_id)
+        if subscription is None:
+            return
+        try:
+            yield f"retry: {settings.SSE_HEARTBEAT_SECONDS * 1000}\n\n"
+            
+            if last_id is not None:
+                async for event in replay_pending(user_id, last_id):
+                    last_id = event["id"]
+                    yield format_sse(event)
+            
+            while True:
+                if subscription.overflowed:
+                    subscription.reset()
+                    async for event in replay_pending(user_id, last_id or 0):
+                        last_id = event["id"]
+                        yield format_sse(event)
+                
+                try:
+                    topic, event = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=settings.SSE_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                
+                if topic != TOPIC_MESSAGE:
+                    yield format_sse(event, topic)
+                    continue
+                
+                # Security: Skip events already replayed from the database
+                if last_id is not None and event["id"] <= last_id:
+                    continue
+                last_id = event["id"]
+                yield format_sse(event)
+        finally:
+            notification_hub.unsubscribe(user_id, subscription)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.post("/trusted-user-request")
@@ -82,20 +282,17 @@ async def create_trusted_user_request(
         )
     
     # Security: Create message for target user
-    message = {
-        "id": f"trusted_{current_user.user_id}_{datetime.utcnow().timestamp()}",
-        "type": "trusted_user_request",
-        "from": current_user.username,
-        "fromEmail": f"{current_user.username}@example.com",
-        "message": "wants to add you as a trusted user",
-        "timestamp": datetime.utcnow().isoformat(),
-        "status": "pending",
-    }
-    
-    if target_user.user_id not in messages_store:
-        messages_store[target_user.user_id] = []
+    message = Message(
+        recipient_id=target_user.user_id,
+        sender_id=current_user.user_id,
+        message_type=MESSAGE_TRUSTED_USER_REQUEST,
+        status=MESSAGE_PENDING,
+        created_at=datetime.utcnow(),
+    )
+    db.add(message)
+    await db.commit()
     
-    messages_store[target_user.user_id].append(message)
+    event_bus.publish(target_user.user_id, TOPIC_MESSAGE, message_to_dict(message, current_user.username))
     
     return {"success": True, "message": "Request sent successfully"}
 
@@ -110,8 +307,11 @@ async def create_group_invitation(
 ):
     """
     Create a group invitation
-    Security: Authentication required, user validation
+    Security: Authentication required, admin check, user validation
     """
+    # Security: Only admins of the group can invite to it
+    await ensure_group_admin(db, current_user, body.group_name, "Only group admins can send invitations")
+    
     # Security: Find target user
     result = await db.execute(
         select(User).where(User.username == body.target_username)
@@ -125,100 +325,204 @@ async def create_group_invitation(
         )
     
     # Security: Create message for target user
-    message = {
-        "id": f"group_{current_user.user_id}_{datetime.utcnow().timestamp()}",
-        "type": "group_invitation",
-        "from": current_user.username,
-        "groupName": body.group_name,
-        "message": "invited you to join the group",
-        "timestamp": datetime.utcnow().isoformat(),
-        "status": "pending",
-    }
-    
-    if target_user.user_id not in messages_store:
-        messages_store[target_user.user_id] = []
+    message = Message(
+        recipient_id=target_user.user_id,
+        sender_id=current_user.user_id,
+        message_type=MESSAGE_GROUP_INVITATION,
+        group_name=body.group_name,
+        status=MESSAGE_PENDING,
+        created_at=datetime.utcnow(),
+    )
+    db.add(message)
+    await db.commit()
     
-    messages_store[target_user.user_id].append(message)
+    event_bus.publish(target_user.user_id, TOPIC_MESSAGE, message_to_dict(message, current_user.username))
     
     return {"success": True, "message": "Invitation sent successfully"}
 
 
-from sqlalchemy import text
+@router.post("/group-invitations")
+@limiter.limit(settings.RATE_LIMIT_GENERAL)
+async def create_group_invitations(
+    request: Request,
+    body: BulkGroupInvitationBody,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Invite several users to a group in one request
+    Security: Authentication required, admin check, user validation
+    Performance: One IN query resolves all usernames; invitations are
+    inserted as a single multi-row batch
+    """
+    # Security: Only admins of the group can invite to it
+    await ensure_group_admin(db, current_user, body.group_name, "Only group admins can send invitations")
+    
+    # Security: Report repeated usernames instead of inviting twice
+    usernames: List[str] = []
+    duplicates: List[str] = []
+    seen = set()
+    for username in (name.strip() for name in body.target_usernames):
+        if username in seen:
+            if username not in duplicates:
+                duplicates.append(username)
+            continue
+        seen.add(username)
+        usernames.append(username)
+    
+    result = await db.execute(
+        select(User.user_id, User.username).where(User.username.in_(usernames))
+    )
+    user_ids = {username: user_id for user_id, username in result.all()}
+    unknown = [username for username in usernames if username not in user_ids]
+    
+    members_result = await db.execute(
+        select(GroupMember.user_id).where(
+            GroupMember.group_name == body.group_name,
+            GroupMember.user_id.in_(user_ids.values())
+        )
+    )
+    member_ids = set(members_result.scalars().all())
+    
+    invited_result = await db.execute(
+        select(Message.recipient_id).where(
+            Message.recipient_id.in_(user_ids.values()),
+            Message.status == MESSAGE_PENDING,
+            Message.message_type == MESSAGE_GROUP_INVITATION,
+            Message.group_name == body.group_name
+        )
+    )
+    pending_ids = set(invited_result.scalars().all())
+    
+    already_member = [u for u in usernames if u in user_ids and user_ids[u] in member_ids]
+    already_invited = [
+        u for u in usernames
+        if u in user_ids and user_ids[u] in pending_ids and user_ids[u] not in member_ids
+    ]
+    to_invite = [
+        u for u in usernames
+        if u in user_ids and user_ids[u] not in member_ids and user_ids[u] not in pending_ids
+    ]
+    
+    if to_invite:
+        created_at = datetime.utcnow()
+        recipient_ids = [user_ids[u] for u in to_invite]
+        await db.execute(
+            insert(Message),
+            [
+                {
+                    "recipient_id": recipient_id,
+                    "sender_id": current_user.user_id,
+                    "message_type": MESSAGE_GROUP_INVITATION,
+                    "group_name": body.group_name,
+                    "status": MESSAGE_PENDING,
+                    "created_at": created_at,
+                }
+                for recipient_id in recipient_ids
+            ],
+        )
+        await db.commit()
+        
+        # Load the generated ids so stream clients can dedupe and resume
+        created_result = await db.execute(
+            select(Message).where(
+                Message.recipient_id.in_(recipient_ids),
+                Message.sender_id == current_user.user_id,
+                Message.message_type == MESSAGE_GROUP_INVITATION,
+                Message.group_name == body.group_name,
+                Message.status == MESSAGE_PENDING
+            )
+        )
+        for message in created_result.scalars().all():
+            event_bus.publish(
+                message.recipient_id, TOPIC_MESSAGE, message_to_dict(message, current_user.username)
+            )
+    
+    return {
+        "success": True,
+        "invited": to_invite,
+        "unknown": unknown,
+        "duplicates": duplicates,
+        "already_member": already_member,
+        "already_invited": already_invited,
+    }
+
 
 @router.post("/{message_id}/accept")
 @limiter.limit(settings.RATE_LIMIT_GENERAL)
 async def accept_message(
     request: Request,
-    message_id: str,
+    message_id: int,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Accept a message (trusted user request or group invitation)
     Adds user to group_members table if applicable.
+    Security: Database errors propagate; get_db rolls back and the generic
+    error handler keeps their details from clients
     """
-    user_messages = messages_store.get(current_user.user_id, [])
-    message = next((msg for msg in user_messages if msg.get("id") == message_id), None)
+    message = await get_pending_message(db, message_id, current_user.user_id)
 
-    if message is None:
-        raise HTTPException(status_code=404, detail="Message not found")
-
-    if message.get("status") != "pending":
-        raise HTTPException(status_code=400, detail="Message already processed")
-
-    # Mark message as accepted
-    message["status"] = "accepted"
+    # Mark message as accepted (committed with the membership change)
+    message.status = MESSAGE_ACCEPTED
+    message.processed_at = datetime.utcnow()
 
     # --- Handle group invitation acceptance ---
-    if message["type"] == "group_invitation":
-        group_name = message.get("groupName")
+    if message.message_type == MESSAGE_GROUP_INVITATION:
+        group_name = message.group_name
         if not group_name:
             raise HTTPException(status_code=400, detail="Invalid group name")
 
-        try:
-            # ✅ Check if already member using proper SQL text()
-            result = await db.execute(
-                text("""
-                    SELECT 1 FROM group_members
-                    WHERE group_name = :gname AND user_id = :uid
-                """),
-                {"gname": group_name, "uid": current_user.user_id},
-            )
-            existing = result.first()
-
-            if existing:
-                return {"success": True, "message": f"Already a member of {group_name}"}
-
-            # ✅ Insert new group member
-            await db.execute(
-                text("""
-                    INSERT INTO group_members (group_name, user_id, admin_status, password_id)
-                    VALUES (:gname, :uid, FALSE, NULL)
-                """),
-                {"gname": group_name, "uid": current_user.user_id},
-            )
+        # ✅ Check if already member using proper SQL text()
+        result = await db.execute(
+            text("""
+                SELECT 1 FROM group_members
+                WHERE group_name = :gname AND user_id = :uid
+            """),
+            {"gname": group_name, "uid": current_user.user_id},
+        )
+        existing = result.first()
+
+        if existing:
             await db.commit()
+            publish_status(message)
+            return {"success": True, "message": f"Already a member of {group_name}"}
 
-            return {
-                "success": True,
-                "message": f"You have successfully joined the group '{group_name}'.",
-            }
+        # ✅ Insert new group member
+        await db.execute(
+            text("""
+                INSERT INTO group_members (group_name, user_id, admin_status, password_id)
+                VALUES (:gname, :uid, FALSE, NULL)
+            """),
+            {"gname": group_name, "uid": current_user.user_id},
+        )
+        await db.commit()
+        group_role_cache.invalidate_user(current_user.user_id)
+        publish_status(message)
 
-        except Exception as e:
-            await db.rollback()
-            raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        return {
+            "success": True,
+            "message": f"You have successfully joined the group '{group_name}'.",
+        }
 
     # --- Handle trusted user request acceptance ---
-    elif message["type"] == "trusted_user_request":
+    elif message.message_type == MESSAGE_TRUSTED_USER_REQUEST:
+        await db.commit()
+        publish_status(message)
         return {"success": True, "message": "Trusted user request accepted."}
 
     # Default case
+    await db.commit()
+    publish_status(message)
     return {"success": True, "message": "Message accepted."}
+
+
 @router.post("/{message_id}/reject")
 @limiter.limit(settings.RATE_LIMIT_GENERAL)
 async def reject_message(
     request: Request,
-    message_id: str,
+    message_id: int,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
@@ -226,24 +530,13 @@ async def reject_message(
     Reject a message (trusted user request or group invitation)
     Security: Authentication required, message validation
     """
-    user_messages = messages_store.get(current_user.user_id, [])
-    
-    message = next((msg for msg in user_messages if msg.get("id") == message_id), None)
-    
-    if message is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Message not found"
-        )
-    
-    if message.get("status") != "pending":
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Message already processed"
-        )
+    message = await get_pending_message(db, message_id, current_user.user_id)
     
     # Security: Update message status
-    message["status"] = "rejected"
+    message.status = MESSAGE_REJECTED
+    message.processed_at = datetime.utcnow()
+    await db.commit()
+    publish_status(message)
     
     return {"success": True, "message": "Message rejected"}
 
@@ -252,14 +545,41 @@ async def reject_message(
 @limiter.limit(settings.RATE_LIMIT_GENERAL)
 async def get_message_count(
     request: Request,
+    wait: int = Query(0, ge=0),
+    since: Optional[int] = Query(None, ge=0),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Get count of pending messages
+    With wait and since, long-polls until the count differs from since or
+    wait seconds pass (capped at MESSAGE_COUNT_MAX_WAIT_SECONDS)
     Security: Authentication required
+    Performance: No DB session is held while waiting
     """
-    user_messages = messages_store.get(current_user.user_id, [])
-    pending_count = len([msg for msg in user_messages if msg.get("status") == "pending"])
+    user_id = current_user.user_id
+    if not wait or since is None:
+        return {"count": await count_pending(db, user_id)}
     
-    return {"count": pending_count}
\ No newline at end of file
+    deadline = time.monotonic() + min(wait, settings.MESSAGE_COUNT_MAX_WAIT_SECONDS)
+    first = True
+    while True:
+        # Watch before counting: a message arriving in between sets the event
+        with pending_count_waiters.watch(user_id) as changed:
+            if first:
+                count = await count_pending(db, user_id)
+                # Performance: Release the pool connection and admission slot before waiting
+                await db.close()
+                first = False
+            else:
+                # Performance: Re-counts are admitted like any other DB work
+                async with admitted_session() as recount_db:
+                    count = await count_pending(recount_db, user_id)
+            
+            remaining = deadline - time.monotonic()
+            if count != since or remaining <= 0:
+                return {"count": count}
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return {"count": count}
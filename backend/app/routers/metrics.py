@@ -0,0 +1,44 @@
+"""
+Prometheus metrics route
+Security: Only served to scrapers that send METRICS_TOKEN as a bearer token,
+from the configured client addresses (loopback by default)
+"""
+import hmac
+from fastapi import APIRouter, HTTPException, status, Request
+from fastapi.responses import PlainTextResponse
+from app.metrics import registry
+from app.config import settings
+from app.rate_limit import get_remote_address
+
+router = APIRouter(tags=["Metrics"])
+
+# Starlette appends "; charset=utf-8" to text/* media types
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def _has_token(request: Request) -> bool:
+    """Check the bearer token; the address alone proves nothing behind a proxy"""
+    if not settings.METRICS_TOKEN:
+        return False
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    # Security: Constant-time comparison of the scrape token
+    return scheme.lower() == "bearer" and hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode())
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics(request: Request):
+    """
+    Metrics of this worker in Prometheus text exposition format
+    Security: Unknown clients get 404 so the endpoint is not advertised
+    """
+    if not (
+        settings.METRICS_ENABLED
+        and _has_token(request)
+        and get_remote_address(request) in settings.METRICS_ALLOWED_CLIENTS
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Not found"
+        )
+
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -5,8 +5,6 @@ Security: CRUD operations with authentication and authorization
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 from datetime import datetime
 from typing import List
 from app.database import get_db
@@ -17,9 +15,13 @@ from app.schemas import (
 from app.dependencies import get_current_user
 from app.security import calculate_password_strength, sanitize_input
 from app.config import settings
+from app.bus import event_bus, TOPIC_VAULT
+from app.rate_limit import limiter
+from app.responses import RowSerializer, fast_response
 
 router = APIRouter(prefix="/api/passwords", tags=["Passwords"])
-limiter = Limiter(key_func=get_remote_address)
+
+password_serializer = RowSerializer(PasswordResponse)
 
 
 @router.post("", response_model=PasswordResponse, status_code=status.HTTP_201_CREATED)
@@ -56,6 +58,9 @@ async def create_password(
     await db.commit()
     await db.refresh(new_password)
     
+    # Performance: Let the user's other sessions refresh their vault
+    event_bus.publish(current_user.user_id, TOPIC_VAULT, {"action": "created", "password_id": new_password.password_id})
+    
     return PasswordResponse.model_validate(new_password)
 
 
@@ -93,10 +98,11 @@ async def get_passwords(
     count_result = await db.execute(count_query)
     total = count_result.scalar()
     
-    return PasswordListResponse(
-        passwords=[PasswordResponse.model_validate(p) for p in passwords],
-        total=total
-    )
+    # Performance: Trusted rows serialized once, without re-validation
+    return fast_response({
+        "passwords": password_serializer.dump_many(passwords),
+        "total": total,
+    })
 
 
 @router.get("/recent", response_model=List[PasswordResponse])
@@ -122,7 +128,7 @@ async def get_recent_passwords(
     )
     passwords = result.scalars().all()
     
-    return [PasswordResponse.model_validate(p) for p in passwords]
+    return fast_response(password_serializer.dump_many(passwords))
 
 
 @router.get("/{password_id}", response_model=PasswordResponse)
@@ -203,6 +209,8 @@ async def update_password(
     await db.commit()
     await db.refresh(password)
     
+    event_bus.publish(current_user.user_id, TOPIC_VAULT, {"action": "updated", "password_id": password_id})
+    
     return PasswordResponse.model_validate(password)
 
 
@@ -235,6 +243,8 @@ async def delete_password(
     await db.delete(password)
     await db.commit()
     
+    event_bus.publish(current_user.user_id, TOPIC_VAULT, {"action": "deleted", "password_id": password_id})
+    
     return None
 
 
@@ -292,5 +302,5 @@ async def get_passwords_by_application(
     )
     passwords = result.scalars().all()
     
-    return [PasswordResponse.model_validate(p) for p in passwords]
+    return fast_response(password_serializer.dump_many(passwords))
 
@@ -5,8 +5,6 @@ Security: Password strength analysis, compromised password detection
 from fastapi import APIRouter, Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 from typing import List, Dict, Any
 from app.database import get_db
 from app.models import User, Password
@@ -15,9 +13,9 @@ from app.dependencies import get_current_user
 from app.security import calculate_password_strength
 from app.config import settings
 from fastapi import HTTPException, status
+from app.rate_limit import limiter
 
 router = APIRouter(prefix="/api/security", tags=["Security"])
-limiter = Limiter(key_func=get_remote_address)
 
 # Security: Compromised passwords list (in production, use Have I Been Pwned API)
 COMPROMISED_PASSWORDS = {
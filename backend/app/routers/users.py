@@ -5,16 +5,14 @@ Security: Authenticated search with minimal data exposure
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 from typing import List, Dict, Any
 from app.database import get_db
 from app.models import User
 from app.dependencies import get_current_user
 from app.config import settings
+from app.rate_limit import limiter
 
 router = APIRouter(prefix="/api/users", tags=["Users"])
-limiter = Limiter(key_func=get_remote_address)
 
 
 @router.get("/search", response_model=List[Dict[str, Any]])
@@ -132,6 +132,22 @@ class GroupShareRequest(BaseModel):
     user_ids: List[int] = Field(..., min_items=1)
 
 
+class SharedPasswordItem(BaseModel):
+    """Password shared with the current user through a group"""
+    password_id: int
+    application_name: str
+    account_user_name: str
+    group_name: str
+    owner_id: int
+    owner_username: str
+
+
+class SharedPasswordPage(BaseModel):
+    """Cursor-paginated page of shared passwords"""
+    items: List[SharedPasswordItem]
+    next_cursor: Optional[str] = None
+
+
 # Security Analysis Schemas
 class PasswordAnalysisResponse(BaseModel):
     """Password analysis response"""
@@ -191,11 +207,26 @@ class TrustedUserRequest(BaseModel):
 
 class MessageResponse(BaseModel):
     """Message response"""
-    id: str
+    id: int
     type: str
     from_user: str
     from_email: Optional[str] = None
     group_name: Optional[str] = None
     message: str
     timestamp: str
-    status: str
\ No newline at end of file
+    status: str
+
+# Security Audit Schemas
+class SecurityEventResponse(BaseModel):
+    """Persisted security audit event"""
+    event_id: int
+    event_type: str
+    created_at: datetime
+    username: Optional[str] = None
+    client_ip: Optional[str] = None
+    method: Optional[str] = None
+    path: Optional[str] = None
+    status_code: Optional[int] = None
+    
+    class Config:
+        from_attributes = True
@@ -8,7 +8,9 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from passlib.hash import argon2, bcrypt
 import re
+import time
 from app.config import settings
+from app.metrics import password_hash_seconds
 
 # Security: Password hashing context with Argon2 (winner of PHC)
 # Security: Argon2 is resistant to GPU/ASIC attacks and timing attacks
@@ -27,6 +29,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Verify a password against a hash
     Security: Constant-time comparison to prevent timing attacks
     """
+    start = time.perf_counter()
     try:
         # Security: Support both SHA256 (legacy) and Argon2/bcrypt (new)
         if hashed_password.startswith("sha256$"):
@@ -41,6 +44,8 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
             return pwd_context.verify(plain_password, hashed_password)
     except Exception:
         return False
+    finally:
+        password_hash_seconds.observe(time.perf_counter() - start, "verify")
 
 
 def get_password_hash(password: str) -> str:
@@ -48,7 +53,11 @@ def get_password_hash(password: str) -> str:
     Hash a password using Argon2
     Security: Argon2 is the current best practice for password hashing
     """
-    return pwd_context.hash(password)
+    start = time.perf_counter()
+    try:
+        return pwd_context.hash(password)
+    finally:
+        password_hash_seconds.observe(time.perf_counter() - start, "hash")
 
 
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
@@ -0,0 +1,291 @@
+"""
+Production server: a supervisor and pre-forked uvicorn workers
+Performance: The supervisor imports the application once, binds the listening
+socket and forks workers that share it, so CPU-bound work (Argon2, JSON) runs
+on every core. Workers use uvloop and httptools when installed.
+Security: Each worker discards inherited database connections and starts
+its own log listener. Per-worker backends of shared state are replaced
+before the application is imported: RATE_LIMIT_BACKEND=memory becomes
+shared (otherwise every worker would grant the full login budget) and
+EVENT_BUS_BACKEND=local becomes unix (cache invalidations and
+notifications must reach every worker)
+
+Signals (to the supervisor):
+    TERM, INT   graceful shutdown; workers finish in-flight requests
+    HUP         rolling restart, one worker at a time (same code: the
+                application was imported before forking)
+    TTIN, TTOU  add / remove one worker
+
+Usage (from backend/):
+    python -m app.server [--workers 0] [--host 0.0.0.0] [--port 8000] [--app app.main:app]
+"""
+import argparse
+import importlib.util
+import logging
+import os
+import select
+import signal
+import socket
+import time
+from typing import Dict, List, Optional
+import uvicorn
+from app.config import settings
+
+logger = logging.getLogger("app.server")
+
+MB = 1024 * 1024
+# A worker that exits sooner than this after starting counts as a failed start
+MIN_WORKER_LIFETIME = 5.0
+
+
+def cpu_limit() -> int:
+    """CPUs this process may use (affinity mask and cgroup v2 quota)"""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def memory_budget() -> int:
+    """Bytes available for workers: SERVER_MEMORY_BUDGET_MB, else MemAvailable"""
+    if settings.SERVER_MEMORY_BUDGET_MB:
+        return settings.SERVER_MEMORY_BUDGET_MB * MB
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+
+
+def worker_memory() -> int:
+    """
+    Peak memory of one worker
+    Performance: Hashing runs on the event loop, so a worker computes at most
+    one Argon2 hash at a time and needs ARGON2_MEMORY_COST (KiB) on top of
+    its baseline
+    """
+    return settings.SERVER_WORKER_BASE_MB * MB + settings.ARGON2_MEMORY_COST * 1024
+
+
+def auto_workers() -> int:
+    """One worker per usable CPU, capped by what fits in the memory budget"""
+    return max(1, min(cpu_limit(), memory_budget() // worker_memory()))
+
+
+def share_worker_state() -> None:
+    """Switch per-process backends to host-wide ones (workers can be added at runtime)"""
+    if settings.RATE_LIMIT_BACKEND == "memory":
+        logger.warning("RATE_LIMIT_BACKEND=memory is per worker; using shared")
+        settings.RATE_LIMIT_BACKEND = "shared"
+    if settings.EVENT_BUS_BACKEND == "local":
+        logger.warning("EVENT_BUS_BACKEND=local is per worker; using unix")
+        settings.EVENT_BUS_BACKEND = "unix"
+
+
+class Supervisor:
+    """Forks, watches and replaces uvicorn workers sharing one listening socket"""
+
+    def __init__(self, config: uvicorn.Config, workers: int):
+        self.config = config
+        self.workers = workers
+        self.children: Dict[int, float] = {}  # pid -> start time
+        self.retiring: Dict[int, float] = {}  # pid -> kill deadline
+        self.restart_queue: List[int] = []
+        self.signals: List[int] = []
+        self.failures = 0
+        self.next_spawn = 0.0
+        self.sock: Optional[socket.socket] = None
+
+    def run(self) -> int:
+        share_worker_state()
+        # Performance: Import the application once; workers inherit it
+        self.config.load()
+        self.sock = self.config.bind_socket()
+
+        wakeup_r, wakeup_w = socket.socketpair()
+        wakeup_r.setblocking(False)
+        wakeup_w.setblocking(False)
+        self._wakeup = (wakeup_r, wakeup_w)
+        signal.set_wakeup_fd(wakeup_w.fileno())
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU, signal.SIGCHLD):
+            signal.signal(sig, self._on_signal)
+
+        logger.info(
+            "Starting %d workers (loop=%s, http=%s)", self.workers,
+            "uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+            "httptools" if importlib.util.find_spec("httptools") else "h11",
+        )
+        while True:
+            self._scale()
+            select.select([wakeup_r], [], [], 1.0)
+            try:
+                while wakeup_r.recv(64):
+                    pass
+            except BlockingIOError:
+                pass
+            self._reap()
+
+            pending, self.signals = self.signals, []
+            for sig in pending:
+                if sig in (signal.SIGTERM, signal.SIGINT):
+                    return self._shutdown()
+                if sig == signal.SIGHUP:
+                    logger.info("Rolling restart of %d workers", len(self.children))
+                    self.restart_queue = [pid for pid in self.children if pid not in self.retiring]
+                elif sig == signal.SIGTTIN:
+                    self.workers += 1
+                elif sig == signal.SIGTTOU:
+                    self.workers = max(1, self.workers - 1)
+            self._restart_next()
+            self._kill_overdue()
+
+    def _on_signal(self, sig: int, frame) -> None:
+        if sig != signal.SIGCHLD:
+            self.signals.append(sig)
+
+    def _spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._run_worker()
+            except BaseException:
+                logger.exception("Worker crashed")
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = time.monotonic()
+
+    def _run_worker(self) -> None:
+        # uvicorn installs its own TERM/INT handlers for graceful shutdown
+        signal.set_wakeup_fd(-1)
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU, signal.SIGCHLD):
+            signal.signal(sig, signal.SIG_DFL)
+        for sock in self._wakeup:
+            sock.close()
+
+        from app.database import engine
+        from app.logging_config import restart_after_fork
+        restart_after_fork()
+        # Security: Never use pooled connections opened by another process
+        engine.sync_engine.dispose(close=False)
+
+        uvicorn.Server(self.config).run(sockets=[self.sock])
+
+    def _retire(self, pid: int) -> None:
+        """Ask a worker to finish in-flight requests and exit"""
+        self.retiring[pid] = time.monotonic() + settings.SERVER_GRACEFUL_TIMEOUT
+        self._kill(pid, signal.SIGTERM)
+
+    @staticmethod
+    def _kill(pid: int, sig: int) -> None:
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def _scale(self) -> None:
+        active = [pid for pid in self.children if pid not in self.retiring]
+        if len(active) > self.workers:
+            # Retire the newest workers first
+            for pid in sorted(active, key=self.children.get)[self.workers:]:
+                self._retire(pid)
+            return
+        if time.monotonic() < self.next_spawn:
+            return
+        for _ in range(self.workers - len(active)):
+            self._spawn()
+
+    def _restart_next(self) -> None:
+        # One replacement at a time, started before the old worker is retired
+        if not self.restart_queue or self.retiring:
+            return
+        pid = self.restart_queue.pop(0)
+        if pid in self.children:
+            self._spawn()
+            self._retire(pid)
+
+    def _kill_overdue(self) -> None:
+        now = time.monotonic()
+        for pid, deadline in list(self.retiring.items()):
+            if now > deadline:
+                logger.warning("Worker %d did not stop in %ds; killing it", pid, settings.SERVER_GRACEFUL_TIMEOUT)
+                self._kill(pid, signal.SIGKILL)
+
+    def _reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            started = self.children.pop(pid, None)
+            if self.retiring.pop(pid, None) is not None or started is None:
+                continue
+
+            # Unplanned exit (crash, or SERVER_MAX_REQUESTS reached): replace it
+            code = os.waitstatus_to_exitcode(status)
+            if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                self.failures += 1
+                delay = min(2 ** self.failures, 30)
+                self.next_spawn = time.monotonic() + delay
+                logger.error("Worker %d exited with %d during startup; retrying in %ds", pid, code, delay)
+            else:
+                self.failures = 0
+                logger.info("Worker %d exited with %d; replacing it", pid, code)
+
+    def _shutdown(self) -> int:
+        logger.info("Stopping %d workers", len(self.children))
+        for pid in list(self.children):
+            self._retire(pid)
+        deadline = time.monotonic() + settings.SERVER_GRACEFUL_TIMEOUT
+        while self.children and time.monotonic() < deadline:
+            time.sleep(0.1)
+            self._reap()
+        for pid in self.children:
+            self._kill(pid, signal.SIGKILL)
+        self.sock.close()
+        return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with pre-forked uvicorn workers")
+    parser.add_argument("--app", default="app.main:app", help="ASGI application import path")
+    parser.add_argument("--host", default=settings.HOST)
+    parser.add_argument("--port", type=int, default=settings.PORT)
+    parser.add_argument("--workers", type=int, default=settings.SERVER_WORKERS, help="0 sizes from CPU and memory")
+    args = parser.parse_args()
+
+    # Runtime paths (event bus socket, rate limit table) are keyed by port
+    settings.PORT = args.port
+    workers = args.workers or auto_workers()
+    print(
+        f"Workers: {workers} (CPU limit {cpu_limit()}, memory budget {memory_budget() // MB} MB, "
+        f"{worker_memory() // MB} MB per worker)"
+    )
+    config = uvicorn.Config(
+        args.app,
+        host=args.host,
+        port=args.port,
+        loop="auto",  # uvloop when installed
+        http="auto",  # httptools when installed
+        log_level=settings.LOG_LEVEL.lower(),
+        access_log=False,  # Performance: RequestLoggingMiddleware writes the (sampled) access log
+        backlog=settings.SERVER_BACKLOG,
+        limit_max_requests=settings.SERVER_MAX_REQUESTS or None,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT,
+    )
+    raise SystemExit(Supervisor(config, workers).run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Startup warm-up and cold-start report
+Performance: Before a worker takes traffic it opens DB_POOL_SIZE pool
+connections concurrently, configures the ORM mappers and runs the hot query
+shapes once, so the first requests after a deploy find connected sockets and
+SQLAlchemy's compiled-statement cache already filled. Phase timings are
+logged as one "startup" record.
+
+CLI (from backend/):
+    python -m app.warmup imports [--limit 25]   slowest imports of app.main
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import configure_mappers
+from sqlalchemy.sql import Executable
+from app.config import settings
+from app.database import AsyncSessionLocal, engine
+from app.models import Password, User
+
+logger = logging.getLogger("app.startup")
+
+# Statement shapes of the hottest endpoints; id 0 never matches a row, and
+# SQLAlchemy caches compiled statements by shape, not by parameter values
+HOT_QUERIES: List[Callable[[], Executable]] = [
+    # POST /api/auth/login
+    lambda: select(User).where(User.username == ""),
+    # get_current_user (every authenticated request)
+    lambda: select(User).where(User.user_id == 0),
+    # GET /api/passwords
+    lambda: select(Password).where(Password.user_id == 0)
+    .order_by(Password.datetime_added.desc()).offset(0).limit(1),
+    lambda: select(func.count(Password.password_id)).where(Password.user_id == 0),
+    # GET /api/passwords/recent
+    lambda: select(Password).where(Password.user_id == 0).order_by(Password.datetime_added.desc()).limit(1),
+    # GET, PUT and DELETE /api/passwords/{password_id}
+    lambda: select(Password).where(and_(Password.password_id == 0, Password.user_id == 0)),
+]
+
+
+async def prewarm_pool(count: int, timeout: float) -> int:
+    """Open up to `count` pool connections concurrently; returns how many opened"""
+    async def open_connection():
+        return await asyncio.wait_for(engine.connect(), timeout)
+
+    results = await asyncio.gather(*(open_connection() for _ in range(count)), return_exceptions=True)
+    connections = [result for result in results if not isinstance(result, BaseException)]
+    # Closing returns each connection to the pool, where it stays open
+    for connection in connections:
+        await connection.close()
+    return len(connections)
+
+
+async def warm_queries(execute: bool) -> None:
+    """Configure mappers and run (or, without a database, compile) the hot queries"""
+    configure_mappers()
+    if not execute:
+        for build in HOT_QUERIES:
+            build().compile(dialect=engine.dialect)
+        return
+    async with AsyncSessionLocal() as session:
+        for build in HOT_QUERIES:
+            await session.execute(build())
+
+
+async def warm_up() -> Dict[str, Any]:
+    """Run all warm-up phases; returns the startup report"""
+    report: Dict[str, Any] = {"pool_size": settings.DB_POOL_SIZE}
+    start = time.perf_counter()
+
+    phase = time.perf_counter()
+    report["pool_connections"] = (
+        await prewarm_pool(settings.DB_POOL_SIZE, settings.DB_POOL_PREWARM_TIMEOUT_SECONDS)
+        if settings.DB_POOL_PREWARM else 0
+    )
+    report["pool_prewarm_ms"] = round((time.perf_counter() - phase) * 1000, 1)
+
+    phase = time.perf_counter()
+    try:
+        await warm_queries(execute=report["pool_connections"] > 0)
+    except Exception as e:
+        logger.warning(f"Query warm-up failed: {type(e).__name__}")
+    report["query_warmup_ms"] = round((time.perf_counter() - phase) * 1000, 1)
+
+    report["warmup_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return report
+
+
+def import_report(limit: int) -> List[str]:
+    """Slowest modules imported by app.main (python -X importtime), slowest first"""
+    import subprocess
+    import sys
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True, text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append((int(cumulative_us), int(self_us), name))
+    rows.sort(reverse=True)
+    return [f"{cumulative / 1000:>9.1f} {own / 1000:>9.1f}  {name}" for cumulative, own, name in rows[:limit]]
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cold-start diagnostics")
+    commands = parser.add_subparsers(dest="command", required=True)
+    imports_parser = commands.add_parser("imports", help="slowest imports of app.main")
+    imports_parser.add_argument("--limit", type=int, default=25)
+    args = parser.parse_args()
+
+    print(f"{'total ms':>9} {'self ms':>9}  module")
+    for line in import_report(args.limit):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
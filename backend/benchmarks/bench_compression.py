@@ -0,0 +1,84 @@
+"""
+Benchmark: response compression cost per codec and level
+
+Compresses representative JSON bodies (a page of vault rows as served by
+GET /api/passwords, and a security analysis report) with every available
+codec at several levels, and reports the compression ratio and CPU time per
+megabyte. brotli and zstd rows appear only when those packages are installed.
+
+Usage (from backend/):
+    python -m benchmarks.bench_compression [--rows 500] [--repeat 20]
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+import orjson
+from app.compression import CODECS
+
+LEVELS = {
+    "gzip": (1, 4, 6, 9),
+    "br": (1, 4, 6, 11),
+    "zstd": (1, 3, 9, 19),
+}
+
+
+def password_page(rows: int) -> bytes:
+    now = datetime.utcnow()
+    return orjson.dumps({
+        "passwords": [
+            {
+                "password_id": i,
+                "application_name": f"application-{i}",
+                "account_user_name": f"user{i}@example.com",
+                "application_password": f"gAAAAABl{i:08d}Q2k3x9vJbW1pLr7sYtUo0eNcVfH4zKmA",
+                "datetime_added": now - timedelta(minutes=i),
+                "pswd_strength": 70 + i % 30,
+            }
+            for i in range(rows)
+        ],
+        "total": rows,
+    })
+
+
+def security_analysis(rows: int) -> bytes:
+    return orjson.dumps({
+        "total_passwords": rows,
+        "weak_passwords": [{"password_id": i, "application_name": f"application-{i}", "strength": 30 + i % 20} for i in range(0, rows, 7)],
+        "reused_passwords": [{"application_names": [f"application-{i}", f"application-{i + 1}"], "count": 2} for i in range(0, rows, 11)],
+        "old_passwords": [{"password_id": i, "application_name": f"application-{i}", "age_days": 200 + i} for i in range(0, rows, 5)],
+        "average_strength": 74.5,
+        "recommendations": ["Update weak passwords", "Avoid password reuse", "Rotate passwords older than 180 days"],
+    })
+
+
+def measure(factory, level: int, body: bytes, repeat: int):
+    compressed = b""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        compressor = factory(level)
+        compressed = compressor.compress(body) + compressor.flush()
+    elapsed = (time.perf_counter() - start) / repeat
+    return len(body) / len(compressed), elapsed * 1000 / (len(body) / 1_000_000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    payloads = {
+        "passwords": password_page(args.rows),
+        "analysis": security_analysis(args.rows),
+    }
+    print(f"codecs available: {', '.join(CODECS)}")
+    print(f"{'payload':<10} {'bytes':>8} {'codec':<5} {'level':>5} {'ratio':>6} {'ms/MB':>8}")
+    for name, body in payloads.items():
+        for encoding, factory in CODECS.items():
+            for level in LEVELS[encoding]:
+                ratio, ms_per_mb = measure(factory, level, body, args.repeat)
+                print(f"{name:<10} {len(body):>8} {encoding:<5} {level:>5} {ratio:>6.2f} {ms_per_mb:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
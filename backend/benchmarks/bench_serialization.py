@@ -0,0 +1,113 @@
+"""
+Benchmark: GET /api/passwords response serialization
+
+Serves one page of vault rows through FastAPI in-process twice: the previous
+path (model_validate per row, response_model re-validation, jsonable_encoder,
+stdlib json) and the fast path (RowSerializer + orjson, no validation).
+Database access is excluded; both endpoints return the same ORM objects.
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization [--rows 100] [--requests 2000]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+from app.models import Password
+from app.schemas import PasswordResponse, PasswordListResponse
+from app.responses import RowSerializer, fast_response
+
+
+def make_rows(count: int):
+    now = datetime.utcnow()
+    return [
+        Password(
+            password_id=i,
+            user_id=1,
+            application_name=f"application-{i}",
+            account_user_name=f"user{i}@example.com",
+            application_password=f"encrypted-password-value-{i:06d}",
+            datetime_added=now - timedelta(minutes=i),
+            pswd_strength=70 + i % 30,
+        )
+        for i in range(count)
+    ]
+
+
+def build_app(rows) -> FastAPI:
+    serializer = RowSerializer(PasswordResponse)
+    app = FastAPI()
+
+    @app.get("/legacy", response_model=PasswordListResponse, response_class=JSONResponse)
+    async def legacy():
+        return PasswordListResponse(
+            passwords=[PasswordResponse.model_validate(p) for p in rows],
+            total=len(rows),
+        )
+
+    @app.get("/fast", response_model=PasswordListResponse, response_class=ORJSONResponse)
+    async def fast():
+        return fast_response({"passwords": serializer.dump_many(rows), "total": len(rows)})
+
+    return app
+
+
+async def one_request(app, path: str):
+    body = []
+    messages = iter([{"type": "http.request", "body": b"", "more_body": False}])
+
+    async def receive():
+        return next(messages, {"type": "http.disconnect"})
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": b"", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    return time.perf_counter() - start, b"".join(body)
+
+
+async def run(app, path: str, requests: int):
+    for _ in range(50):
+        await one_request(app, path)
+    latencies = []
+    for _ in range(requests):
+        elapsed, _ = await one_request(app, path)
+        latencies.append(elapsed)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    app = build_app(make_rows(args.rows))
+
+    # Both paths must produce the same document
+    _, legacy_body = asyncio.run(one_request(app, "/legacy"))
+    _, fast_body = asyncio.run(one_request(app, "/fast"))
+    assert json.loads(legacy_body) == json.loads(fast_body), "responses differ"
+
+    print(f"{args.rows} rows per response")
+    print(f"{'path':<10} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>8}")
+    for name in ("legacy", "fast"):
+        p50, p99 = asyncio.run(run(app, f"/{name}", args.requests))
+        print(f"{name:<10} {p50 * 1000:>8.3f} {p99 * 1000:>8.3f} {1 / p50:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: JSON vs MessagePack wire format
+
+Encodes and decodes the GET /api/passwords and GET /api/security/analysis
+bodies in both formats, as rendered by NegotiatedResponse, and reports body
+size (raw and gzip-compressed) and encode/decode time per response.
+
+Usage (from backend/):
+    python -m benchmarks.bench_wire_format [--rows 500] [--repeat 200]
+"""
+import argparse
+import gzip
+import time
+import msgpack
+import orjson
+from app.responses import RowSerializer, packb
+from app.schemas import PasswordResponse
+from benchmarks.bench_serialization import make_rows
+
+
+def password_list(rows) -> dict:
+    serializer = RowSerializer(PasswordResponse)
+    return {"passwords": serializer.dump_many(rows), "total": len(rows)}
+
+
+def security_analysis(rows) -> dict:
+    # Same shape as PasswordAnalysisResponse: every row flagged as weak, every
+    # fifth one as compromised and every seventh one as reused
+    def entry(row, **extra):
+        return {
+            "id": str(row.password_id),
+            "platform": row.application_name,
+            "username": row.account_user_name,
+            "password": row.application_password,
+            **extra,
+        }
+
+    return {
+        "total_passwords": len(rows),
+        "compromised_count": len(rows) // 5,
+        "weak_count": len(rows),
+        "reused_count": len(rows) // 7,
+        "strong_count": 0,
+        "health_score": 12,
+        "compromised_passwords": [entry(r, breachCount=1, lastBreachDate="2024-01-15") for r in rows[::5]],
+        "weak_passwords": [
+            entry(r, score=30 + r.password_id % 10, issues=["Too short", "No special characters"]) for r in rows
+        ],
+        "reused_passwords": [
+            entry(r, reuseCount=2, usedIn=[f"{r.application_name} ({r.account_user_name})", "other (other@example.com)"])
+            for r in rows[::7]
+        ],
+    }
+
+
+def timed(func, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    payloads = {"passwords": password_list(rows), "analysis": security_analysis(rows)}
+    formats = {
+        "json": (orjson.dumps, orjson.loads),
+        "msgpack": (packb, msgpack.unpackb),
+    }
+
+    print(f"{args.rows} rows")
+    print(f"{'payload':<10} {'format':<8} {'bytes':>8} {'gzip':>7} {'enc ms':>7} {'dec ms':>7}")
+    for name, content in payloads.items():
+        decoded = {}
+        for fmt, (encode, decode) in formats.items():
+            body, encode_time = timed(lambda: encode(content), args.repeat)
+            decoded[fmt], decode_time = timed(lambda: decode(body), args.repeat)
+            print(
+                f"{name:<10} {fmt:<8} {len(body):>8} {len(gzip.compress(body, 6)):>7} "
+                f"{encode_time * 1000:>7.3f} {decode_time * 1000:>7.3f}"
+            )
+        # Both formats must carry the same document
+        assert decoded["json"] == decoded["msgpack"], f"{name}: formats differ"
+
+
+if __name__ == "__main__":
+    main()
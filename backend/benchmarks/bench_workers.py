@@ -0,0 +1,135 @@
+"""
+Benchmark: end-to-end throughput across worker counts
+
+Starts `python -m app.server` with this module's application (the full
+middleware stack, no database) for each worker count, drives it over HTTP
+keep-alive connections from separate client processes, and reports requests
+per second and latency. Endpoints:
+    /rows   one page of vault rows through fast_response (JSON work)
+    /login  one Argon2 verification with the configured cost (hashing work)
+
+Client processes share the machine with the server; give the benchmark a
+host with spare cores, or fewer --clients, for meaningful numbers.
+
+Usage (from backend/):
+    python -m benchmarks.bench_workers [--workers 1,2,4,8] [--path /rows] [--duration 10]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from fastapi import FastAPI
+from app.middleware import setup_middleware
+from app.responses import NegotiatedResponse, RowSerializer, fast_response
+from app.schemas import PasswordResponse
+from app.security import get_password_hash, verify_password
+from benchmarks.bench_serialization import make_rows
+
+_rows = make_rows(100)
+_serializer = RowSerializer(PasswordResponse)
+_password_hash = get_password_hash("correct horse battery staple")
+
+app = setup_middleware(FastAPI(default_response_class=NegotiatedResponse))
+
+
+@app.get("/rows")
+async def rows():
+    return fast_response({"passwords": _serializer.dump_many(_rows), "total": len(_rows)})
+
+
+@app.get("/login")
+async def login():
+    return {"verified": verify_password("correct horse battery staple", _password_hash)}
+
+
+async def _connection(port: int, path: str, deadline: float, latencies: list):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    request = f"GET {path} HTTP/1.1\r\nHost: bench\r\n\r\n".encode()
+    try:
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            writer.write(request)
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = next(
+                int(line.split(b":", 1)[1]) for line in head.split(b"\r\n")
+                if line.lower().startswith(b"content-length:")
+            )
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+def _client(port: int, path: str, connections: int, duration: float) -> list:
+    latencies: list = []
+
+    async def run():
+        deadline = time.monotonic() + duration
+        await asyncio.gather(*(_connection(port, path, deadline, latencies) for _ in range(connections)))
+
+    asyncio.run(run())
+    return latencies
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(port: int, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def measure(workers: int, path: str, clients: int, connections: int, duration: float):
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.server", "--app", "benchmarks.bench_workers:app",
+         "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        env={**os.environ, "LOG_REQUEST_SAMPLE_RATE": "0"},
+    )
+    try:
+        _wait_ready(port)
+        # Warm up every worker
+        _client(port, path, workers * 2, 1.0)
+        with multiprocessing.Pool(clients) as pool:
+            results = pool.starmap(_client, [(port, path, connections, duration)] * clients)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+    latencies = sorted(latency for result in results for latency in result)
+    return len(latencies) / duration, statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", default="1,2,4,8", help="comma-separated worker counts")
+    parser.add_argument("--path", default="/rows", choices=["/rows", "/login"])
+    parser.add_argument("--clients", type=int, default=2, help="load generator processes")
+    parser.add_argument("--connections", type=int, default=16, help="keep-alive connections per client")
+    parser.add_argument("--duration", type=float, default=10)
+    args = parser.parse_args()
+
+    print(f"{args.path}: {args.clients} clients x {args.connections} connections, {args.duration:.0f}s")
+    print(f"{'workers':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for workers in (int(w) for w in args.workers.split(",")):
+        rps, p50, p99 = measure(workers, args.path, args.clients, args.connections, args.duration)
+        print(f"{workers:>7} {rps:>9.0f} {p50 * 1000:>8.2f} {p99 * 1000:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
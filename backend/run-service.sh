@@ -2,7 +2,7 @@
 
 # User-space service manager (NO SUDO REQUIRED)
 # Manages the backend service using nohup and process management
-# Usage: ./run-service.sh {start|stop|restart|status|logs}
+# Usage: ./run-service.sh {start|stop|restart|reload|status|logs}
 
 set -e
 
@@ -13,7 +13,6 @@ cd "$SCRIPT_DIR"
 APP_DIR="$SCRIPT_DIR"
 VENV_DIR="${APP_DIR}/venv"
 PYTHON_BIN="${VENV_DIR}/bin/python"
-UVICORN_BIN="${VENV_DIR}/bin/uvicorn"
 PID_FILE="${APP_DIR}/app.pid"
 LOG_FILE="${APP_DIR}/app.log"
 ERROR_LOG="${APP_DIR}/app.error.log"
@@ -65,10 +64,10 @@ start_service() {
     cd "$APP_DIR"
     source "${VENV_DIR}/bin/activate"
     
-    nohup "$UVICORN_BIN" app.main:app \
+    # Supervisor with pre-forked workers (SERVER_WORKERS, default: one per CPU)
+    nohup "$PYTHON_BIN" -m app.server \
         --host 0.0.0.0 \
         --port "$API_PORT" \
-        --log-level info \
         > "$LOG_FILE" 2> "$ERROR_LOG" &
     
     PID=$!
@@ -105,7 +104,8 @@ stop_service() {
     kill "$PID" 2>/dev/null || true
     
     # Wait for process to stop
-    for i in {1..10}; do
+    # Workers get SERVER_GRACEFUL_TIMEOUT (30s) to finish in-flight requests
+    for i in {1..35}; do
         if ! ps -p "$PID" > /dev/null 2>&1; then
             break
         fi
@@ -138,6 +138,18 @@ restart_service() {
     start_service
 }
 
+# Replace workers one at a time without dropping connections
+reload_service() {
+    if ! is_running; then
+        echo -e "${YELLOW}⚠️  Service is not running${NC}"
+        return 1
+    fi
+
+    echo -e "${BLUE}🔄 Rolling restart of workers...${NC}"
+    kill -HUP "$(cat "$PID_FILE")"
+    echo -e "${GREEN}✅ Workers are being replaced${NC}"
+}
+
 # Check service status
 status_service() {
     if is_running; then
@@ -194,6 +206,9 @@ case "${1:-}" in
     restart)
         restart_service
         ;;
+    reload)
+        reload_service
+        ;;
     status)
         status_service
         ;;
@@ -201,12 +216,13 @@ case "${1:-}" in
         show_logs
         ;;
     *)
-        echo "Usage: $0 {start|stop|restart|status|logs}"
+        echo "Usage: $0 {start|stop|restart|reload|status|logs}"
         echo ""
         echo "Commands:"
         echo "  start   - Start the backend service"
         echo "  stop    - Stop the backend service"
         echo "  restart - Restart the backend service"
+        echo "  reload  - Replace workers one at a time (no downtime)"
         echo "  status  - Check service status"
         echo "  logs    - Show service logs (follow mode)"
         exit 1